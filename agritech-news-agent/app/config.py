@@ -17,3 +17,11 @@ POSTGRES = {
     "password": os.getenv("POSTGRES_PASSWORD", "postgres"),
     "database": os.getenv("POSTGRES_DB", "arxiv_db"),
 }
+
+# Connection pool shared by every app.db caller in a process
+POSTGRES_POOL = {
+    "min_size": int(os.getenv("POSTGRES_POOL_MIN", 1)),
+    "max_size": int(os.getenv("POSTGRES_POOL_MAX", 10)),
+    # Connections idle for longer than this are pinged before being handed out
+    "healthcheck_after": float(os.getenv("POSTGRES_POOL_HEALTHCHECK_AFTER", 30)),
+}
@@ -1,12 +1,54 @@
 # app/db.py
 
+import os
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from app.config import POSTGRES
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+from app.config import POSTGRES, POSTGRES_POOL
 
 TABLE_NAME = "articles"
+CRAWL_STATE_TABLE = "crawl_state"
+QUERY_MATCHES_TABLE = "article_queries"
+ARTICLE_EVENTS_CHANNEL = "article_events"
+
+ARTICLE_COLUMNS = (
+    "article_id", "title", "authors", "abstract",
+    "submission_date", "originally_announced",
+    "pdf_url", "uploaded_file_url",
+)
+# Typed copies of the date strings, derived on insert (see `article_row`)
+DATE_COLUMNS = ("submitted_on", "announced_on")
+INSERT_COLUMNS = ARTICLE_COLUMNS + DATE_COLUMNS
+RANGE_COLUMNS = ("submitted_on", "announced_on", "created_at")
+
+def parse_submission_date(text):
+    """arXiv "2 January, 2024" -> date(2024, 1, 2); None if missing or malformed."""
+    try:
+        return datetime.strptime(text.strip(), "%d %B, %Y").date()
+    except (AttributeError, ValueError):
+        return None
+
+def parse_announced_date(text):
+    """arXiv "January 2024" -> date(2024, 1, 1) (first of the month); None if missing or malformed."""
+    try:
+        return datetime.strptime(text.strip(), "%B %Y").date()
+    except (AttributeError, ValueError):
+        return None
+
+def article_row(article) -> tuple:
+    """Values for INSERT_COLUMNS."""
+    return tuple(article[column] for column in ARTICLE_COLUMNS) + (
+        parse_submission_date(article["submission_date"]),
+        parse_announced_date(article["originally_announced"]),
+    )
 
 def get_connection():
+    """Open a dedicated, unpooled connection. Prefer `connection()` for regular queries."""
     return psycopg2.connect(
         host=POSTGRES["host"],
         port=POSTGRES["port"],
@@ -15,11 +57,128 @@ def get_connection():
         dbname=POSTGRES["database"]
     )
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
+class ConnectionPool:
+    """
+    Thread-safe pool of psycopg2 connections.
 
-    cur.execute(f"""
+    `connection()` blocks while all `max_size` connections are checked out,
+    health-checks the connection it hands out, commits on success and rolls
+    back on error before returning it to the pool. Returned connections stay
+    open (up to `max_size`) for the next caller; `min_size` are opened upfront.
+    """
+
+    def __init__(self, min_size: int = 1, max_size: int = 10, healthcheck_after: float = 30):
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.healthcheck_after = healthcheck_after
+        self._idle = []  # Most recently returned last, handed out first
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._last_used = {}
+        self._closed = False
+        for _ in range(self.min_size):
+            self._checkin(get_connection())
+
+    def _is_healthy(self, conn) -> bool:
+        if conn.closed or conn.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < self.healthcheck_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+        if not conn.closed:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+
+    def _checkin(self, conn):
+        with self._lock:
+            if not self._closed:
+                self._last_used[id(conn)] = time.monotonic()
+                self._idle.append(conn)
+                return
+        self._discard(conn)
+
+    def _checkout(self):
+        # A dead connection is dropped and replaced; give up after max_size attempts
+        for _ in range(self.max_size):
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return get_connection()
+            if self._is_healthy(conn):
+                return conn
+            self._discard(conn)
+        raise psycopg2.OperationalError("Could not get a healthy connection from the pool")
+
+    @contextmanager
+    def connection(self):
+        self._slots.acquire()
+        try:
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
+                broken = bool(conn.closed)
+                raise
+            finally:
+                if broken:
+                    self._discard(conn)
+                else:
+                    self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            self._discard(conn)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide pool, creating it on first use (and again after a fork)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(**POSTGRES_POOL)
+            _pool_pid = os.getpid()
+        return _pool
+
+@contextmanager
+def connection():
+    """Check out a pooled connection: `with connection() as conn: ...`"""
+    with get_pool().connection() as conn:
+        yield conn
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+
+def init_db():
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
         CREATE TABLE IF NOT EXISTS {TABLE_NAME} (
             id SERIAL PRIMARY KEY UNIQUE,
             article_id TEXT UNIQUE,
@@ -30,50 +189,487 @@ def init_db():
             originally_announced TEXT,
             pdf_url TEXT,
             uploaded_file_url TEXT,
+            pdf_sha256 TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         );
     """)
-    conn.commit()
-    cur.close()
-    conn.close()
+        # Tables created before content-addressed PDFs lack the hash column
+        cur.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS pdf_sha256 TEXT;")
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_pdf_sha256 ON {TABLE_NAME} (pdf_sha256);")
+        # Typed dates for range queries; older rows are filled by `backfill_article_dates`
+        cur.execute(f"""
+            ALTER TABLE {TABLE_NAME}
+            ADD COLUMN IF NOT EXISTS submitted_on DATE,
+            ADD COLUMN IF NOT EXISTS announced_on DATE;
+        """)
+        for column in RANGE_COLUMNS:
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_{column} ON {TABLE_NAME} ({column});")
+        # Full-text search over the metadata, kept up to date by Postgres itself
+        cur.execute(f"""
+            ALTER TABLE {TABLE_NAME}
+            ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(abstract, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(authors, '')), 'C')
+            ) STORED;
+        """)
+        cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_search_vector ON {TABLE_NAME} USING GIN (search_vector);")
+        # What the last PDF download returned: arXiv version and HTTP validators for conditional refreshes
+        cur.execute(f"""
+            ALTER TABLE {TABLE_NAME}
+            ADD COLUMN IF NOT EXISTS pdf_version INTEGER,
+            ADD COLUMN IF NOT EXISTS pdf_etag TEXT,
+            ADD COLUMN IF NOT EXISTS pdf_last_modified TEXT,
+            ADD COLUMN IF NOT EXISTS pdf_checked_at TIMESTAMP;
+        """)
+        # Set by the RAG indexer once the article's PDF is searchable
+        cur.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN IF NOT EXISTS indexed_at TIMESTAMP;")
+        # The indexer's backlog query (`get_articles_to_index`) reads this small partial index
+        # instead of scanning the table once everything is indexed
+        cur.execute(f"""
+            CREATE INDEX IF NOT EXISTS idx_{TABLE_NAME}_unindexed
+            ON {TABLE_NAME} (id) WHERE indexed_at IS NULL;
+        """)
+        # NOTIFY listeners (app/rag/indexer.py) when an article is inserted and when its PDF lands
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION notify_{TABLE_NAME}_event() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify(
+                    '{ARTICLE_EVENTS_CHANNEL}',
+                    json_build_object('article_id', NEW.article_id, 'event', lower(TG_OP))::text
+                );
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        cur.execute(f"""
+            CREATE OR REPLACE TRIGGER {TABLE_NAME}_inserted
+            AFTER INSERT ON {TABLE_NAME}
+            FOR EACH ROW EXECUTE FUNCTION notify_{TABLE_NAME}_event();
+        """)
+        cur.execute(f"""
+            CREATE OR REPLACE TRIGGER {TABLE_NAME}_pdf_uploaded
+            AFTER UPDATE OF uploaded_file_url ON {TABLE_NAME}
+            FOR EACH ROW
+            WHEN (NEW.uploaded_file_url IS NOT NULL AND NEW.uploaded_file_url IS DISTINCT FROM OLD.uploaded_file_url)
+            EXECUTE FUNCTION notify_{TABLE_NAME}_event();
+        """)
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CRAWL_STATE_TABLE} (
+            query_url TEXT PRIMARY KEY,
+            last_offset INTEGER NOT NULL,
+            page_size INTEGER NOT NULL,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+        cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {QUERY_MATCHES_TABLE} (
+            article_id TEXT NOT NULL,
+            query TEXT NOT NULL,
+            matched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (article_id, query)
+        );
+    """)
     print(f"✅ PostgreSQL table '{TABLE_NAME}' is ready.")
 
 def insert_article(article):
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-
     try:
-        cur.execute("""
-            INSERT INTO articles (
-                article_id, title, authors, abstract,
-                submission_date, originally_announced,
-                pdf_url, uploaded_file_url
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            ON CONFLICT (article_id) DO NOTHING;
-        """, (
-            article["article_id"],
-            article["title"],
-            article["authors"],
-            article["abstract"],
-            article["submission_date"],
-            article["originally_announced"],
-            article["pdf_url"],
-            article["uploaded_file_url"]
-        ))
-        conn.commit()
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO articles ({", ".join(INSERT_COLUMNS)})
+                VALUES ({", ".join(["%s"] * len(INSERT_COLUMNS))})
+                ON CONFLICT (article_id) DO NOTHING;
+            """, article_row(article))
         print(f"📝 Saved: {article['article_id']}")
     except Exception as e:
         print(f"❌ Failed to insert {article['article_id']}: {e}")
-    finally:
-        cur.close()
-        conn.close()
+
+def insert_articles(articles, crawl_state=None) -> list:
+    """
+    Insert many articles with a single multi-row INSERT ... ON CONFLICT DO NOTHING.
+    Returns the article_ids that were actually inserted; the rest already existed.
+    If `crawl_state` is given, the crawl cursor is saved in the same transaction.
+    """
+    if not articles and not crawl_state:
+        return []
+
+    rows = []
+    with connection() as conn, conn.cursor() as cur:
+        if articles:
+            rows = execute_values(
+                cur,
+                f"""
+                INSERT INTO {TABLE_NAME} ({", ".join(INSERT_COLUMNS)})
+                VALUES %s
+                ON CONFLICT (article_id) DO NOTHING
+                RETURNING article_id;
+                """,
+                [article_row(article) for article in articles],
+                page_size=len(articles),
+                fetch=True,
+            )
+        if crawl_state:
+            _save_crawl_state(cur, **crawl_state)
+    return [row[0] for row in rows]
+
+def upsert_articles(articles) -> int:
+    """
+    Insert articles or overwrite the parsed fields of existing rows (used when
+    re-parsing archived pages). uploaded_file_url and pdf_sha256 are left as they are.
+    If an id appears more than once, the last occurrence wins. Returns the number of rows written.
+    """
+    latest = {article["article_id"]: article for article in articles}
+    if not latest:
+        return 0
+
+    parsed_columns = [column for column in INSERT_COLUMNS if column not in ("article_id", "uploaded_file_url")]
+    with connection() as conn, conn.cursor() as cur:
+        rows = execute_values(
+            cur,
+            f"""
+            INSERT INTO {TABLE_NAME} ({", ".join(INSERT_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (article_id) DO UPDATE
+            SET {", ".join(f"{column} = EXCLUDED.{column}" for column in parsed_columns)}
+            RETURNING article_id;
+            """,
+            [article_row(article) for article in latest.values()],
+            page_size=len(latest),
+            fetch=True,
+        )
+    return len(rows)
+
+def _save_crawl_state(cur, query_url, last_offset, page_size):
+    cur.execute(f"""
+        INSERT INTO {CRAWL_STATE_TABLE} (query_url, last_offset, page_size)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (query_url) DO UPDATE
+        SET last_offset = EXCLUDED.last_offset,
+            page_size = EXCLUDED.page_size,
+            updated_at = CURRENT_TIMESTAMP;
+    """, (query_url, last_offset, page_size))
+
+def get_crawl_state(query_url):
+    """Return the saved cursor for a search URL ({last_offset, page_size, ...}) or None."""
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"SELECT * FROM {CRAWL_STATE_TABLE} WHERE query_url = %s;", (query_url,))
+        return cur.fetchone()
+
+def reset_crawl_state(query_url):
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"DELETE FROM {CRAWL_STATE_TABLE} WHERE query_url = %s;", (query_url,))
+
+class ArticleWriter:
+    """
+    Buffers parsed articles and writes them with `insert_articles` once
+    `batch_size` are pending (or on `flush()`), keeping inserted/skipped counts.
+    """
+
+    def __init__(self, batch_size: int = 100):
+        self.batch_size = batch_size
+        self.buffer = []
+        self.inserted = 0
+        self.skipped = 0
+        self.failed = 0
+
+    def add(self, article) -> list:
+        """Buffer one article. Returns the inserted ids if this triggered a flush."""
+        self.buffer.append(article)
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return []
+
+    def flush(self, crawl_state=None) -> list:
+        """
+        Write the buffered articles in one round-trip. `crawl_state`
+        ({query_url, last_offset, page_size}) is committed atomically with them.
+        """
+        if not self.buffer:
+            if crawl_state:
+                try:
+                    insert_articles([], crawl_state)
+                except Exception as e:
+                    print(f"❌ Failed to save crawl state: {e}")
+            return []
+
+        # Keep the first occurrence of an id so one batch never conflicts with itself
+        batch, seen = [], set()
+        for article in self.buffer:
+            if article["article_id"] not in seen:
+                seen.add(article["article_id"])
+                batch.append(article)
+        duplicates = len(self.buffer) - len(batch)
+        self.buffer = []
+
+        try:
+            inserted_ids = insert_articles(batch, crawl_state)
+        except Exception as e:
+            print(f"❌ Failed to insert batch of {len(batch)} articles: {e}")
+            self.failed += len(batch)
+            self.skipped += duplicates
+            return []
+
+        self.inserted += len(inserted_ids)
+        self.skipped += len(batch) - len(inserted_ids) + duplicates
+        print(f"📝 Saved batch: {len(inserted_ids)} inserted, {len(batch) - len(inserted_ids) + duplicates} skipped")
+        return inserted_ids
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+def update_uploaded_file_url(article_id, uploaded_file_url, pdf_sha256=None,
+                             pdf_version=None, pdf_etag=None, pdf_last_modified=None):
+    """
+    Store the uploaded PDF's URL and, when known, the SHA-256 of its bytes, its
+    arXiv version and the ETag / Last-Modified validators it was served with.
+    A hash that differs from the stored one clears `indexed_at`, so the RAG
+    indexer picks the new content up.
+    """
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                f"""
+                UPDATE {TABLE_NAME}
+                SET uploaded_file_url = %(url)s,
+                    indexed_at = CASE WHEN pdf_sha256 <> %(sha256)s THEN NULL ELSE indexed_at END,
+                    pdf_sha256 = COALESCE(%(sha256)s, pdf_sha256),
+                    pdf_version = COALESCE(%(version)s, pdf_version),
+                    pdf_etag = COALESCE(%(etag)s, pdf_etag),
+                    pdf_last_modified = COALESCE(%(last_modified)s, pdf_last_modified),
+                    pdf_checked_at = CURRENT_TIMESTAMP
+                WHERE article_id = %(article_id)s;
+                """,
+                {
+                    "url": uploaded_file_url,
+                    "sha256": pdf_sha256,
+                    "version": pdf_version,
+                    "etag": pdf_etag,
+                    "last_modified": pdf_last_modified,
+                    "article_id": article_id,
+                }
+            )
+    except Exception as e:
+        print(f"❌ Failed to update uploaded_file_url for {article_id}: {e}")
+
+def mark_pdf_checked(article_id):
+    """Record that the stored PDF was found unchanged upstream."""
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"UPDATE {TABLE_NAME} SET pdf_checked_at = CURRENT_TIMESTAMP WHERE article_id = %s;",
+            (article_id,)
+        )
+
+def get_pdfs_to_refresh(checked_before=None, limit: int = None) -> list:
+    """
+    Articles with an uploaded PDF that was never checked, or last checked
+    before `checked_before`, least recently checked first.
+    """
+    condition = "AND (pdf_checked_at IS NULL OR pdf_checked_at < %s)" if checked_before else ""
+    params = [checked_before] if checked_before else []
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT article_id, pdf_url, uploaded_file_url, pdf_sha256, pdf_version, pdf_etag, pdf_last_modified
+            FROM {TABLE_NAME}
+            WHERE uploaded_file_url IS NOT NULL {condition}
+            ORDER BY pdf_checked_at NULLS FIRST, id
+            {"LIMIT %s" if limit else ""};
+        """, params + ([limit] if limit else []))
+        return cur.fetchall()
+
+def record_query_matches(query, article_ids):
+    """Remember that `query` returned these articles (one row per article and query)."""
+    article_ids = list(dict.fromkeys(article_ids))
+    if not article_ids:
+        return
+    try:
+        with connection() as conn, conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"""
+                INSERT INTO {QUERY_MATCHES_TABLE} (article_id, query)
+                VALUES %s
+                ON CONFLICT (article_id, query) DO NOTHING;
+                """,
+                [(article_id, query) for article_id in article_ids],
+                page_size=len(article_ids),
+            )
+    except Exception as e:
+        print(f"❌ Failed to record matches for query '{query}': {e}")
+
+def get_article_queries(article_id) -> list:
+    """Queries that have returned this article, oldest match first."""
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"SELECT query FROM {QUERY_MATCHES_TABLE} WHERE article_id = %s ORDER BY matched_at, query;",
+            (article_id,)
+        )
+        return [row[0] for row in cur.fetchall()]
+
+def backfill_article_dates(batch_size: int = 1000) -> int:
+    """
+    Fill submitted_on / announced_on for rows inserted before those columns
+    existed. Rows are walked by id in batches of `batch_size`, each committed
+    on its own, so the table is never locked for long and an interrupted run
+    can simply be restarted. Returns the number of rows updated.
+    """
+    last_id, updated = 0, 0
+    while True:
+        with connection() as conn, conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT id, submission_date, originally_announced FROM {TABLE_NAME}
+                WHERE id > %s AND (submitted_on IS NULL OR announced_on IS NULL)
+                ORDER BY id
+                LIMIT %s;
+            """, (last_id, batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            values = [
+                (row_id, parse_submission_date(submission_date), parse_announced_date(announced))
+                for row_id, submission_date, announced in rows
+            ]
+            values = [value for value in values if value[1] or value[2]]
+            if values:
+                execute_values(
+                    cur,
+                    f"""
+                    UPDATE {TABLE_NAME} AS a
+                    SET submitted_on = COALESCE(v.submitted_on, a.submitted_on),
+                        announced_on = COALESCE(v.announced_on, a.announced_on)
+                    FROM (VALUES %s) AS v (id, submitted_on, announced_on)
+                    WHERE a.id = v.id;
+                    """,
+                    values,
+                    template="(%s, %s::date, %s::date)",
+                    page_size=len(values),
+                )
+            updated += len(values)
+        print(f"🗓️ Backfilled dates up to id {last_id} ({updated} row(s) updated)")
+    return updated
+
+def _range_filter(start, end, column):
+    if column not in RANGE_COLUMNS:
+        raise ValueError(f"column must be one of {RANGE_COLUMNS}")
+    conditions, params = [f"{column} IS NOT NULL"], []
+    if start is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{column} < %s")
+        params.append(end)
+    return " AND ".join(conditions), params
+
+def get_articles_between(start=None, end=None, column: str = "submitted_on", limit: int = None) -> list:
+    """
+    Articles whose `column` (submitted_on, announced_on or created_at) falls in
+    [start, end), oldest first. Either bound may be None. Served by the
+    column's B-tree index, so "everything since X" does not scan the table.
+    """
+    where, params = _range_filter(start, end, column)
+    query = f"SELECT * FROM {TABLE_NAME} WHERE {where} ORDER BY {column}, id"
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(query + ";", params)
+        return cur.fetchall()
+
+def count_articles_between(start=None, end=None, column: str = "submitted_on") -> int:
+    """Number of articles `get_articles_between` would return without a limit."""
+    where, params = _range_filter(start, end, column)
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE {where};", params)
+        return cur.fetchone()[0]
+
+SEARCH_RESULT_COLUMNS = (
+    "id", "article_id", "title", "authors", "abstract",
+    "submitted_on", "announced_on", "pdf_url", "uploaded_file_url",
+)
+
+def search_articles(query: str, limit: int = 20, after: tuple = None) -> list:
+    """
+    Full-text search on title (weighted highest), abstract and authors using
+    web-search syntax ("soil moisture" -drone, OR). Results are ordered by
+    rank, then id, and paged with a keyset: pass the (rank, id) of the last
+    row as `after` to get the next page. Every page costs the same, however
+    deep it is.
+    """
+    conditions = ["search_vector @@ q"]
+    params = [query]
+    if after is not None:
+        conditions.append("(ts_rank_cd(search_vector, q), id) < (%s::real, %s)")
+        params += [after[0], after[1]]
+    params.append(limit)
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT {", ".join(SEARCH_RESULT_COLUMNS)}, ts_rank_cd(search_vector, q) AS rank
+            FROM {TABLE_NAME}, websearch_to_tsquery('english', %s) AS q
+            WHERE {" AND ".join(conditions)}
+            ORDER BY rank DESC, id DESC
+            LIMIT %s;
+        """, params)
+        return cur.fetchall()
+
+def get_article(article_id):
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"SELECT * FROM {TABLE_NAME} WHERE article_id = %s;", (article_id,))
+        return cur.fetchone()
+
+def get_articles_to_index(limit: int = 100, require_upload: bool = True) -> list:
+    """
+    Articles not indexed yet, oldest first. With `require_upload`, only those
+    whose PDF is already in Spaces (uploaded_file_url set).
+    """
+    condition = "AND uploaded_file_url IS NOT NULL" if require_upload else ""
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute(f"""
+            SELECT * FROM {TABLE_NAME}
+            WHERE indexed_at IS NULL {condition}
+            ORDER BY id
+            LIMIT %s;
+        """, (limit,))
+        return cur.fetchall()
+
+def mark_article_indexed(article_id) -> float:
+    """Set indexed_at to now. Returns the seconds between the article's insert and now."""
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"""
+            UPDATE {TABLE_NAME} SET indexed_at = CURRENT_TIMESTAMP
+            WHERE article_id = %s
+            RETURNING EXTRACT(EPOCH FROM indexed_at - created_at);
+        """, (article_id,))
+        row = cur.fetchone()
+        return float(row[0]) if row else None
+
+def clear_indexed_at() -> int:
+    """
+    Flag every indexed article for re-indexing, e.g. because the RAG collection
+    holding its chunks is being dropped. Returns how many were flagged.
+    """
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"UPDATE {TABLE_NAME} SET indexed_at = NULL WHERE indexed_at IS NOT NULL;")
+        return cur.rowcount
+
+def get_existing_article_ids(article_ids) -> set:
+    """Return the subset of `article_ids` already stored, in one indexed lookup."""
+    article_ids = list(article_ids)
+    if not article_ids:
+        return set()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            f"SELECT article_id FROM {TABLE_NAME} WHERE article_id = ANY(%s);",
+            (article_ids,)
+        )
+        return set(row[0] for row in cur.fetchall())
 
 def get_all_article_ids() -> set:
-    conn = get_connection()
-    cur = conn.cursor(cursor_factory=RealDictCursor)
-    cur.execute("SELECT article_id FROM articles")
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    with connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+        cur.execute("SELECT article_id FROM articles")
+        rows = cur.fetchall()
     return set(row["article_id"] for row in rows)
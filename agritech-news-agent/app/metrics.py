@@ -0,0 +1,255 @@
+# app/metrics.py
+
+import os
+import time
+import threading
+import contextvars
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Process-wide metrics registry shared by the scraper and the RAG side
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))  # 0 = no /metrics endpoint
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_current_run = contextvars.ContextVar("metrics_run", default=None)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        self._add(amount)
+        run = _current_run.get()
+        if run is not None:
+            run.metric(self)._add(amount)
+
+    def _add(self, amount):
+        with self._lock:
+            self.value += amount
+
+    def blank(self):
+        """An unregistered copy starting from zero."""
+        return type(self)(self.name, self.help)
+
+    def snapshot(self):
+        return {"type": self.kind, "value": self.value}
+
+    def render(self):
+        return [f"{self.name} {self.value}"]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram: per-bucket counts plus count and sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        self._observe(value)
+        run = _current_run.get()
+        if run is not None:
+            run.metric(self)._observe(value)
+
+    def _observe(self, value):
+        with self._lock:
+            self.counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+    def blank(self):
+        """An unregistered copy starting from zero."""
+        return Histogram(self.name, self.help, self.buckets)
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {"type": self.kind, "count": self.count, "sum": self.sum, "counts": list(self.counts)}
+
+    def render(self):
+        snap = self.snapshot()
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), snap["counts"]):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"{self.name}_sum {snap['sum']}")
+        lines.append(f"{self.name}_count {snap['count']}")
+        return lines
+
+    def quantile(self, q, counts):
+        """Estimate a quantile from bucket counts, interpolating like histogram_quantile()."""
+        total = sum(counts)
+        if not total:
+            return None
+        rank, cumulative, lower = q * total, 0, 0.0
+        for bound, count in zip(self.buckets, counts):
+            if count and cumulative + count >= rank:
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            lower = bound
+        return self.buckets[-1]  # Past the last finite bucket
+
+
+class RunMetrics:
+    """
+    Counters and histograms recorded by one run only (see `Registry.run`),
+    next to the process-wide values.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def metric(self, metric):
+        with self._lock:
+            if metric.name not in self._metrics:
+                self._metrics[metric.name] = metric.blank()
+            return self._metrics[metric.name]
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text):
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict:
+        return {name: metric.snapshot() for name, metric in list(self._metrics.items())}
+
+    @contextmanager
+    def run(self):
+        """
+        Also record the counters and histograms updated from the current
+        context on a RunMetrics of its own, so runs sharing the process (e.g.
+        concurrent API jobs) are summarized separately. asyncio tasks,
+        `asyncio.to_thread` and threads started with a copy of the context
+        record to the same run.
+        """
+        run = RunMetrics()
+        token = _current_run.set(run)
+        try:
+            yield run
+        finally:
+            _current_run.reset(token)
+
+    @staticmethod
+    def in_run() -> bool:
+        return _current_run.get() is not None
+
+    def summarize(self, before: dict = None) -> dict:
+        """
+        Per-run view of the metrics: inside `run()`, the counters and histograms
+        that run recorded; otherwise the process-wide values, reported as the
+        difference from the `before` snapshot. Gauges are process-wide.
+        """
+        run = _current_run.get()
+        before = {} if run is not None else before or {}
+        summary = {}
+        for name, metric in list(self._metrics.items()):
+            if run is not None and metric.kind != "gauge":
+                now, then = run.metric(metric).snapshot(), None
+            else:
+                now, then = metric.snapshot(), before.get(name)
+            if metric.kind == "gauge":
+                summary[name] = now["value"]
+            elif metric.kind == "counter":
+                summary[name] = now["value"] - (then["value"] if then else 0)
+            else:
+                counts = [a - b for a, b in zip(now["counts"], then["counts"])] if then else now["counts"]
+                count = now["count"] - (then["count"] if then else 0)
+                total = now["sum"] - (then["sum"] if then else 0.0)
+                summary[name] = {
+                    "count": count,
+                    "sum": round(total, 6),
+                    "mean": round(total / count, 6) if count else None,
+                    "p50": metric.quantile(0.5, counts),
+                    "p95": metric.quantile(0.95, counts),
+                }
+        return summary
+
+
+registry = Registry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep scrapes of /metrics out of the job output
+
+
+_server = None
+
+
+def start_metrics_server(port: int = METRICS_PORT):
+    """Serve GET /metrics from a background thread. No-op when `port` is 0 or already serving."""
+    global _server
+    if not port or _server is not None:
+        return _server
+    _server = ThreadingHTTPServer(("0.0.0.0", port), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"📈 Serving Prometheus metrics on :{port}/metrics")
+    return _server
@@ -3,14 +3,17 @@ import time
 import hashlib
 from typing import Any, Dict, List, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.db import search_articles
+
 # ---- RAG utils ----
-from app.rag.modules.embeddings import embed_texts
-from app.rag.modules.generator import generate_response
+from app.rag.modules.embeddings import embed_texts_async
+from app.rag.modules.generator import generate_response_async
+from app.rag.modules.rate_control import mistral_rate
 from app.rag.modules.vectorstore import get_qdrant_client, search_top_k
 from app.rag.ingestion_pipeline import IngestionPipeline
 from app.rag.incremental_ingestion import IncrementalIngestionPipeline
@@ -34,9 +37,9 @@ async def ingest_incrementally() -> Dict[str, Any]:
 
 # ---------- Ingest ----------
 @app.post("/ingest")
-async def ingest() -> Dict[str, Any]:
+async def ingest(stream: bool = False) -> Dict[str, Any]:
     pipeline = IngestionPipeline(data_dir="app/data")
-    results = pipeline.run()
+    results = pipeline.run_streaming() if stream else pipeline.run()
     pipeline.save_results(results)
     return results
 
@@ -52,10 +55,38 @@ async def status() -> Dict[str, Any]:
             info.update({"rag_collection": {"points": points_count}})
         except Exception:
             info.update({"rag_collection": {"points": 0}})
-        return {"status": "ok", "qdrant": info}
+        return {"status": "ok", "qdrant": info, "mistral": mistral_rate.stats()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Qdrant error: {e}")
 
+# ---------- Article search ----------
+def _parse_cursor(cursor: str):
+    try:
+        rank, row_id = cursor.split(":", 1)
+        return float(rank), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@app.get("/articles/search")
+def article_search(
+    q: str = Query(..., min_length=1, description="Keywords, web-search syntax"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Ranked keyword search over article titles, abstracts and authors (Postgres
+    full-text index; no embeddings or Qdrant involved). Pass `next_cursor`
+    back as `cursor` to get the next page. A plain `def`: FastAPI runs it in its
+    threadpool, so the blocking query does not hold up the event loop.
+    """
+    after = _parse_cursor(cursor) if cursor else None
+    try:
+        rows = search_articles(q, limit=limit, after=after)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {e}")
+    next_cursor = f"{rows[-1]['rank']!r}:{rows[-1]['id']}" if len(rows) == limit else None
+    return {"query": q, "results": rows, "next_cursor": next_cursor}
+
 # ---------- Health ----------
 @app.get("/health")
 async def health() -> Dict[str, str]:
@@ -118,7 +149,7 @@ async def chat_completions(request: ChatRequest):
 
         # ---- Embed & search ----
         try:
-            query_vec = embed_texts([question])[0]
+            query_vec = (await embed_texts_async([question]))[0]
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Embedding failed: {e}")
 
@@ -136,7 +167,7 @@ async def chat_completions(request: ChatRequest):
         else:
             # Generate final response from retrieved chunks
             try:
-                answer = generate_response(top_chunks, question)
+                answer = await generate_response_async(top_chunks, question)
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Response generation failed: {e}")
 
@@ -19,7 +19,7 @@ import json
 from typing import List, Dict, Any
 
 # Import des modules
-from app.rag.modules.ingestion import load_pdfs_from_folder
+from app.rag.modules.text_cache import text_cache_for
 from app.rag.modules.chunking import split_texts_into_chunks 
 from app.rag.modules.embeddings import embed_texts
 from app.rag.modules.vectorstore import (
@@ -35,6 +35,8 @@ class IncrementalIngestionPipeline:
         self.qdrant_client = get_qdrant_client()
         self.collection_name = "rag_collection"
         self.auto_confirm = auto_confirm
+        # Extracted texts keyed by PDF content, so no PDF is ever extracted twice
+        self.text_cache = text_cache_for(data_dir)
         
     def get_pdf_files_with_hashes(self) -> Dict[str, str]:
         """Retrieve all PDF files with their hashes."""
@@ -75,17 +77,9 @@ class IncrementalIngestionPipeline:
         print(f"\n📄 Processing: {filename}")
         print(f"🔐 Hash: {file_hash[:8]}...")
         
-        # Extract the content
+        # Extract the content of this file only
         try:
-            texts = load_pdfs_from_folder(self.data_dir, max_files=None)
-            # Filter to keep only the current document
-            current_text = None
-            for text in texts:
-                # Check if this text corresponds to the current file
-                # (approximation based on file size)
-                if len(text) > 1000:  # Basic filter based on file size
-                    current_text = text
-                    break
+            current_text = self.text_cache.extract(file_path)
             
             if not current_text:
                 raise ValueError(f"No content extracted from {filename}")
@@ -181,6 +175,8 @@ class IncrementalIngestionPipeline:
         if results["processed_documents"]:
             total_chunks = sum(doc["chunks_created"] for doc in results["processed_documents"])
             print(f"🧩 Total chunks added: {total_chunks}")
+        print(f"♻️ Text cache: {self.text_cache.hits} hit(s), {self.text_cache.misses} extraction(s)")
+        results["text_cache"] = {"hits": self.text_cache.hits, "extractions": self.text_cache.misses}
         
         # Sauvegarder les résultats
         with open("incremental_ingestion_results.json", "w", encoding="utf-8") as f:
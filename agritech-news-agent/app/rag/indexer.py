@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Event-driven RAG indexer
+========================
+
+Long-running process that makes newly scraped articles searchable without
+copying PDFs into app/data. It LISTENs on the `article_events` channel, which
+Postgres notifies when an article is inserted and when its PDF lands in
+Spaces, then downloads the PDF and runs it through extraction, chunking,
+embedding and the Qdrant upsert.
+
+Notifications are only a wake-up call: on start and every
+INDEXER_POLL_INTERVAL seconds the indexer also catches up on any article
+with `indexed_at` still NULL, so nothing sent while it was down is lost.
+
+Usage:
+    python -m app.rag.indexer          # listen forever
+    python -m app.rag.indexer --once   # index the backlog and exit
+"""
+
+import warnings
+warnings.filterwarnings("ignore", message=".*urllib3.*OpenSSL.*")
+
+import os
+import sys
+import json
+import time
+import select
+from io import BytesIO
+from typing import Any, Dict, Optional
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from app.db import (
+    ARTICLE_EVENTS_CHANNEL,
+    get_article,
+    get_articles_to_index,
+    get_connection,
+    init_db,
+    mark_article_indexed,
+)
+from app.metrics import registry, start_metrics_server
+from app.scraper.pdf_pipeline import download_pdf
+from app.scraper.scraper import rate_limiter
+from app.rag.modules.ingestion import extract_pdf_content_from_bytes
+from app.rag.modules.chunking import split_texts_into_chunks
+from app.rag.modules.embeddings import embed_texts
+from app.rag.modules.vectorstore import (
+    get_qdrant_client,
+    delete_article_points,
+    ensure_collection_exists,
+    is_document_indexed,
+    upsert_document_chunks,
+)
+
+# Only index articles whose PDF is in Spaces; otherwise download from arXiv directly
+INDEXER_REQUIRE_UPLOAD = os.getenv("INDEXER_REQUIRE_UPLOAD", os.getenv("S3_UPLOAD", "false")) == "true"
+INDEXER_POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", 60))  # Seconds between catch-up passes
+INDEXER_BATCH_SIZE = int(os.getenv("INDEXER_BATCH_SIZE", 50))  # Articles fetched per catch-up query
+INDEXER_METRICS_PORT = int(os.getenv("INDEXER_METRICS_PORT", 0))  # 0 = no /metrics endpoint
+RECONNECT_DELAY = 5
+
+TIME_TO_SEARCHABLE_SECONDS = registry.histogram(
+    "rag_time_to_searchable_seconds",
+    "Time from an article's insert to its chunks being searchable in Qdrant",
+    buckets=(10, 30, 60, 120, 300, 600, 1800, 3600, 6 * 3600, 24 * 3600, 7 * 24 * 3600),
+)
+INDEX_SECONDS = registry.histogram("rag_index_seconds", "Time to download, extract, embed and upsert one article")
+ARTICLES_INDEXED = registry.counter("rag_articles_indexed_total", "Articles indexed into Qdrant")
+CHUNKS_INDEXED = registry.counter("rag_chunks_indexed_total", "Chunks upserted into Qdrant")
+INDEX_FAILURES = registry.counter("rag_index_failures_total", "Articles that could not be indexed")
+
+
+class ArticleIndexer:
+    def __init__(self, require_upload: bool = INDEXER_REQUIRE_UPLOAD,
+                 poll_interval: float = INDEXER_POLL_INTERVAL, batch_size: int = INDEXER_BATCH_SIZE):
+        self.require_upload = require_upload
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.qdrant_client = get_qdrant_client()
+        # Articles that failed in this process are not retried until it restarts,
+        # so one broken PDF cannot keep the catch-up loop busy
+        self.failed = set()
+
+    def pdf_source(self, article: Dict[str, Any]) -> Optional[str]:
+        if article.get("uploaded_file_url"):
+            return article["uploaded_file_url"]
+        if self.require_upload:
+            return None
+        return article.get("pdf_url")
+
+    def index_article(self, article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Make one article searchable. Returns None when it is not ready (no PDF yet)."""
+        article_id = article["article_id"]
+        url = self.pdf_source(article)
+        if not url:
+            return None
+
+        print(f"\n📄 Indexing {article_id}: {article['title'][:80]}")
+        with INDEX_SECONDS.time():
+            document_hash = article.get("pdf_sha256")
+            chunks_count = 0
+            if document_hash and is_document_indexed(self.qdrant_client, document_hash):
+                print(f"✅ Same PDF already indexed ({document_hash[:8]}...), skipping embeddings")
+                delete_article_points(self.qdrant_client, article_id, keep_hash=document_hash)
+            else:
+                # Same path as the scraper: per-host rate limit (arXiv's terms), retries, resume
+                buffer = BytesIO()
+                download = download_pdf(url, buffer, rate_limiter=rate_limiter)
+                document_hash = document_hash or download["sha256"]
+
+                text = extract_pdf_content_from_bytes(buffer.getvalue())
+                if not text:
+                    raise ValueError("No text extracted from the PDF")
+                chunks = split_texts_into_chunks([text])
+                embeddings = embed_texts(chunks)
+
+                ensure_collection_exists(self.qdrant_client, len(embeddings[0]))
+                # Chunks of an earlier version of this article's PDF (another hash)
+                delete_article_points(self.qdrant_client, article_id, keep_hash=document_hash)
+                chunks_count = upsert_document_chunks(
+                    self.qdrant_client,
+                    document_hash,
+                    embeddings,
+                    chunks,
+                    payload={"article_id": article_id, "title": article["title"]},
+                )
+
+        seconds = mark_article_indexed(article_id)
+        ARTICLES_INDEXED.inc()
+        CHUNKS_INDEXED.inc(chunks_count)
+        if seconds is not None:
+            TIME_TO_SEARCHABLE_SECONDS.observe(seconds)
+            print(f"🔎 {article_id} searchable {seconds:,.0f}s after it was scraped ({chunks_count} chunks)")
+        return {"article_id": article_id, "hash": document_hash, "chunks": chunks_count, "time_to_searchable": seconds}
+
+    def try_index(self, article: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        article_id = article["article_id"]
+        if article_id in self.failed or article.get("indexed_at"):
+            return None
+        try:
+            return self.index_article(article)
+        except Exception as e:
+            INDEX_FAILURES.inc()
+            self.failed.add(article_id)
+            print(f"❌ Failed to index {article_id}: {e}")
+            return None
+
+    def catch_up(self) -> int:
+        """Index every pending article, oldest first. Returns how many were indexed."""
+        indexed = 0
+        while True:
+            pending = [
+                article for article in get_articles_to_index(self.batch_size + len(self.failed), self.require_upload)
+                if article["article_id"] not in self.failed
+            ][:self.batch_size]
+            if not pending:
+                return indexed
+            progress = indexed + len(self.failed)
+            for article in pending:
+                if self.try_index(article):
+                    indexed += 1
+            if indexed + len(self.failed) == progress:
+                return indexed  # Only articles whose PDF is not available yet
+
+    def handle_notifications(self, conn) -> int:
+        conn.poll()
+        article_ids = []
+        while conn.notifies:
+            notify = conn.notifies.pop(0)
+            try:
+                article_id = json.loads(notify.payload)["article_id"]
+            except (ValueError, KeyError):
+                print(f"⚠️ Ignoring malformed notification: {notify.payload}")
+                continue
+            if article_id not in article_ids:
+                article_ids.append(article_id)
+
+        indexed = 0
+        for article_id in article_ids:
+            article = get_article(article_id)
+            if article and self.try_index(article):
+                indexed += 1
+        return indexed
+
+    def listen(self):
+        conn = get_connection()
+        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {ARTICLE_EVENTS_CHANNEL};")
+            print(f"👂 Listening on '{ARTICLE_EVENTS_CHANNEL}'")
+
+            # Anything inserted while no one was listening
+            self.catch_up()
+            last_catch_up = time.time()
+            while True:
+                timeout = max(0.0, last_catch_up + self.poll_interval - time.time())
+                if select.select([conn], [], [], timeout) != ([], [], []):
+                    self.handle_notifications(conn)
+                if time.time() - last_catch_up >= self.poll_interval:
+                    self.catch_up()
+                    last_catch_up = time.time()
+        finally:
+            conn.close()
+
+    def run(self):
+        print("🚀 Starting the RAG indexer...")
+        print(f"📥 PDF source: {'Spaces only' if self.require_upload else 'Spaces, else arXiv'}")
+        start_metrics_server(INDEXER_METRICS_PORT)
+        while True:
+            try:
+                self.listen()
+            except psycopg2.OperationalError as e:
+                print(f"⚠️ Lost the Postgres connection ({e}); reconnecting in {RECONNECT_DELAY}s")
+                time.sleep(RECONNECT_DELAY)
+
+
+def main():
+    init_db()
+    indexer = ArticleIndexer()
+    if "--once" in sys.argv[1:]:
+        start_time = time.time()
+        indexed = indexer.catch_up()
+        print(f"\n✅ Indexed {indexed} article(s), {len(indexer.failed)} failed")
+        print(f"⏱️ Total time: {time.time() - start_time:.2f}s")
+        return
+    try:
+        indexer.run()
+    except KeyboardInterrupt:
+        print("\n👋 Indexer stopped")
+
+
+if __name__ == "__main__":
+    main()
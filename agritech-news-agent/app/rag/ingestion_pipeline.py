@@ -11,20 +11,64 @@ Steps:
 2. Split into optimized chunks  
 3. Generate embeddings  
 4. Index into the vector database  
+
+With --stream, documents flow through the same steps in small batches
+instead (see `IngestionPipeline.run_streaming`).
 """
 
 import warnings
 warnings.filterwarnings("ignore", message=".*urllib3.*OpenSSL.*")
 
 import os
+import sys
 import json
+import time
+from collections import deque
+from contextlib import closing
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
 
-from app.rag.modules.ingestion import load_pdfs_from_folder, analyze_extracted_content
+from app.db import clear_indexed_at
+from app.rag.modules.ingestion import (
+    PDF_EXTRACT_WORKERS,
+    load_pdfs_from_folder,
+    analyze_extracted_content,
+    extract_pdf_content_ordered,
+    iter_extract_pdfs,
+)
 from app.rag.modules.chunking import split_texts_into_chunks, analyze_chunks
 from app.rag.modules.embeddings import embed_texts
-from app.rag.modules.vectorstore import get_qdrant_client, ensure_collection, upsert_embeddings
+from app.rag.modules.rate_control import mistral_rate
+from app.rag.modules.vectorstore import (
+    get_qdrant_client,
+    ensure_collection,
+    ensure_collection_exists,
+    get_document_hash,
+    is_document_complete,
+    upsert_chunk_batch,
+    upsert_embeddings,
+)
+
+# Chunks embedded and upserted together in streaming mode; bounds memory and lost work
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+
+
+def _flag_indexer_articles() -> None:
+    """
+    The collection is about to be dropped, taking the chunks the RAG indexer
+    added with it: clear `indexed_at` so the indexer puts them back. Raises
+    (and the collection is kept) if Postgres cannot be updated.
+    """
+    flagged = clear_indexed_at()
+    if flagged:
+        print(f"🔁 {flagged} article(s) flagged for re-indexing by the RAG indexer")
+
+
+def _extract_in_process(file_path: str) -> Tuple[str, None, str]:
+    try:
+        return extract_pdf_content_ordered(file_path), None, None
+    except Exception as e:
+        return None, None, str(e)
 
 
 class IngestionPipeline:
@@ -120,7 +164,8 @@ class IngestionPipeline:
             results["steps"]["embeddings"] = {
                 "status": "success",
                 "embeddings_generated": len(chunk_embeddings),
-                "vector_dimension": vector_size
+                "vector_dimension": vector_size,
+                "rate_control": mistral_rate.stats(),
             }
             
             print(f"✅ {len(chunk_embeddings)} embeddings generated")
@@ -140,6 +185,7 @@ class IngestionPipeline:
         
         try:
             # Créer/recréer la collection
+            _flag_indexer_articles()
             ensure_collection(self.qdrant_client, vector_size)
             print(f"✅ Collection '{self.collection_name}' configured")
             
@@ -191,6 +237,120 @@ class IngestionPipeline:
         
         return results
     
+    def iter_documents(self, skip_indexed: bool = True) -> Iterator[Tuple[str, str, str]]:
+        """
+        Yield (filename, document hash, text) one document at a time, in
+        filename order. With several extraction workers, one pool extracts a
+        few PDFs ahead of the consumer for the whole run (see
+        `iter_extract_pdfs`). Documents whose chunks are all in the collection
+        already are skipped.
+        """
+        filenames = [f for f in sorted(os.listdir(self.data_dir)) if f.lower().endswith('.pdf')]
+        todo = deque()  # Documents handed to the extractor, in order, waiting for their text
+
+        def paths():
+            for filename in filenames:
+                file_path = os.path.join(self.data_dir, filename)
+                document_hash = get_document_hash(file_path)
+                if skip_indexed and is_document_complete(self.qdrant_client, document_hash):
+                    print(f"✅ {filename} - already indexed")
+                    continue
+                todo.append((filename, document_hash))
+                yield file_path
+
+        if PDF_EXTRACT_WORKERS > 1:
+            extracted = iter_extract_pdfs(paths(), PDF_EXTRACT_WORKERS)
+        else:
+            extracted = (_extract_in_process(file_path) for file_path in paths())
+
+        with closing(extracted):
+            for text, _, error in extracted:
+                filename, document_hash = todo.popleft()
+                if error:
+                    print(f"❌ Error during the processing of {filename}: {error}")
+                elif not text:
+                    print(f"⚠️  No content extracted from {filename}")
+                else:
+                    yield filename, document_hash, text
+
+    def iter_chunk_batches(self, documents: Iterator[Tuple[str, str, str]],
+                           batch_size: int = INGEST_BATCH_SIZE) -> Iterator[List[Dict[str, Any]]]:
+        """Split documents into chunks and yield them `batch_size` at a time (batches may span documents)."""
+        batch = []
+        for filename, document_hash, text in documents:
+            chunks = split_texts_into_chunks([text], chunk_size_tokens=512, chunk_overlap_tokens=128)
+            print(f"✂️ {filename}: {len(chunks)} chunks")
+            for i, chunk in enumerate(chunks):
+                batch.append({
+                    "text": chunk,
+                    "document_hash": document_hash,
+                    "filename": filename,
+                    "chunk_index": i,
+                    "chunks_total": len(chunks),
+                })
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def run_streaming(self, batch_size: int = INGEST_BATCH_SIZE, recreate: bool = False) -> Dict[str, Any]:
+        """
+        Streaming variant of `run`: documents flow through extract → chunk →
+        embed → upsert in batches of `batch_size` chunks, pulled one batch at a
+        time, so memory stays flat whatever the corpus size and every batch is
+        stored as soon as it is embedded.
+
+        The collection is kept (unless `recreate`) and chunk ids derive from the
+        document hash, so re-running after a failure skips complete documents
+        and only redoes the interrupted ones.
+        """
+        print("🚀 STARTING STREAMING INGESTION PIPELINE")
+        print("=" * 50)
+        start = time.perf_counter()
+
+        results = {
+            "timestamp": datetime.now().isoformat(),
+            "data_directory": self.data_dir,
+            "collection_name": self.collection_name,
+            "mode": "streaming",
+            "batch_size": batch_size,
+        }
+        if recreate and self.qdrant_client.collection_exists(self.collection_name):
+            _flag_indexer_articles()
+            self.qdrant_client.delete_collection(self.collection_name)
+            print(f"🗑️ Collection '{self.collection_name}' dropped")
+
+        documents, batches, chunks_indexed = set(), 0, 0
+        try:
+            for batch in self.iter_chunk_batches(self.iter_documents(), batch_size):
+                embeddings = embed_texts([chunk["text"] for chunk in batch])
+                if not embeddings or not embeddings[0]:
+                    raise RuntimeError("No embedding generated")
+                ensure_collection_exists(self.qdrant_client, len(embeddings[0]))
+                chunks_indexed += upsert_chunk_batch(self.qdrant_client, embeddings, batch)
+                batches += 1
+                documents.update(chunk["document_hash"] for chunk in batch)
+                print(f"🗄️ Batch {batches}: {len(batch)} chunks indexed ({chunks_indexed} in total)")
+        except Exception as e:
+            results["status"] = "error"
+            results["error"] = str(e)
+            print(f"❌ Streaming ingestion stopped: {e}")
+            print("💡 Batches indexed so far are kept; re-run to resume.")
+        else:
+            results["status"] = "success"
+
+        elapsed = time.perf_counter() - start
+        results["summary"] = {
+            "documents_indexed": len(documents),
+            "batches": batches,
+            "total_chunks": chunks_indexed,
+            "elapsed_seconds": round(elapsed, 2),
+            "rate_control": mistral_rate.stats(),
+        }
+        print(f"\n📈 {len(documents)} document(s), {chunks_indexed} chunks in {batches} batch(es), {elapsed:.1f}s")
+        return results
+
     def save_results(self, results: Dict[str, Any], output_file: str = "ingestion_results.json"):
         """Save the pipeline results"""
         try:
@@ -239,7 +399,7 @@ def main():
     
     # Exécuter le pipeline
     pipeline = IngestionPipeline(data_dir)
-    results = pipeline.run()
+    results = pipeline.run_streaming() if "--stream" in sys.argv[1:] else pipeline.run()
     
     # Sauvegarder les résultats
     if results.get("status") == "success":
@@ -1,10 +1,15 @@
 import os
-import time
-from typing import List
+import asyncio
+import weakref
+import threading
+from typing import Any, Dict, Iterator, List, Tuple
 
+import tiktoken
 from dotenv import load_dotenv
 from mistralai import Mistral
 
+from app.rag.modules.rate_control import AdaptiveRateController, mistral_rate, status_code
+
 
 load_dotenv()
 _API_KEY = os.getenv("MISTRAL_API_KEY")
@@ -13,47 +18,167 @@ if not _API_KEY:
         "MISTRAL_API_KEY is not set. Please export it or put it in a .env file."
     )
 
-_client = Mistral(api_key=_API_KEY)
+# One SDK client per event loop: its async HTTP client is bound to the loop it first ran on
+_loop_clients = weakref.WeakKeyDictionary()
 
 
-def embed_texts(texts: List[str], model: str = "mistral-embed") -> List[List[float]]:
+def _async_client() -> Mistral:
+    loop = asyncio.get_running_loop()
+    if loop not in _loop_clients:
+        _loop_clients[loop] = Mistral(api_key=_API_KEY)
+    return _loop_clients[loop]
+
+
+_sync_loop = None
+_sync_loop_pid = None
+_sync_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
     """
-    Calls Mistral embeddings API to transform each text into a vector using
-    the specified embedding model. Includes conservative rate limiting.
+    The event loop synchronous callers run on: one per process, on a daemon
+    thread, so its Mistral client and connections are reused from call to call
+    instead of a new loop (and an unclosed client) per call.
+    """
+    global _sync_loop, _sync_loop_pid
+    with _sync_loop_lock:
+        if _sync_loop is None or _sync_loop_pid != os.getpid():
+            _sync_loop = asyncio.new_event_loop()
+            _sync_loop_pid = os.getpid()
+            threading.Thread(target=_sync_loop.run_forever, name="mistral-embeddings", daemon=True).start()
+        return _sync_loop
+
+
+# Mistral caps one embeddings request at ~16k tokens overall; token counts here
+# use cl100k_base (as the chunker does), which undercounts Mistral's tokenizer,
+# hence the headroom in the default budget
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 128))  # Max texts per embeddings request
+EMBED_BATCH_MAX_TOKENS = int(os.getenv("EMBED_BATCH_MAX_TOKENS", 12000))  # Max tokens per embeddings request
+
+_encoding = None
+
+
+def _count_tokens(text: str) -> int:
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding("cl100k_base")
+    return len(_encoding.encode(text))
+
+
+def _is_too_many_tokens(error: Exception) -> bool:
+    return status_code(error) == 400 and "too many tokens" in str(error).lower()
+
+
+def iter_batches(texts: List[str], max_texts: int = EMBED_BATCH_SIZE,
+                 max_tokens: int = EMBED_BATCH_MAX_TOKENS) -> Iterator[List[Tuple[int, str]]]:
+    """
+    Group the non-empty texts into (index, text) batches that stay under both
+    limits. A single text over `max_tokens` still goes out, alone.
     """
-    embeddings: List[List[float]] = []
-    
+    batch: List[Tuple[int, str]] = []
+    batch_tokens = 0
     for i, text in enumerate(texts):
         if not text:
-            embeddings.append([])
             continue
-            
-        max_retries = 5
-        base_delay = 2.0
-        
-        for attempt in range(max_retries):
+        tokens = _count_tokens(text)
+        if batch and (len(batch) >= max_texts or batch_tokens + tokens > max_tokens):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append((i, text))
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+class AsyncEmbeddingClient:
+    """
+    Embeds batches concurrently. How many requests are in flight is decided by
+    the rate controller, shared with every other Mistral call of the process:
+    it ramps up until the API answers 429, then backs off and honours
+    Retry-After. A throttled batch is retried on its own.
+    """
+
+    def __init__(self, model: str = "mistral-embed", controller: AdaptiveRateController = mistral_rate):
+        self.model = model
+        self.controller = controller
+
+    @property
+    def rate(self) -> float:
+        """Successful requests per second, across everything sharing the controller."""
+        return self.controller.rate()
+
+    @property
+    def throttled(self) -> int:
+        """Requests answered with 429 so far."""
+        return self.controller.throttled
+
+    def stats(self) -> Dict[str, Any]:
+        return self.controller.stats()
+
+    async def embed_batch(self, batch: List[str]) -> List[List[float]]:
+        try:
+            resp = await self.controller.call_async(
+                _async_client().embeddings.create_async, model=self.model, inputs=batch
+            )
+        except Exception as e:
+            if not _is_too_many_tokens(e) or len(batch) < 2:
+                raise
+            # The tokenizer estimate was off for this batch: send it as two halves
+            middle = len(batch) // 2
+            print(f"Batch of {len(batch)} over the token limit, splitting it in two")
+            halves = await asyncio.gather(self.embed_batch(batch[:middle]), self.embed_batch(batch[middle:]))
+            return halves[0] + halves[1]
+        return [item.embedding for item in resp.data]
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Vectors in input order, with [] for empty texts."""
+        embeddings: List[List[float]] = [[] for _ in texts]
+        total = sum(1 for text in texts if text)
+        done = 0
+
+        async def run(batch: List[Tuple[int, str]]):
+            nonlocal done
             try:
-                resp = _client.embeddings.create(model=model, inputs=[text])
-                embeddings.append(resp.data[0].embedding)
-                print(f"Embedded chunk {i+1}/{len(texts)}")
-                
-                # Conservative delay between requests (2 seconds)
-                if i < len(texts) - 1:
-                    time.sleep(2.0)
-                break
-                
+                vectors = await self.embed_batch([text for _, text in batch])
             except Exception as e:
-                if "rate_limited" in str(e).lower() or "429" in str(e):
-                    if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)  # Exponential backoff
-                        print(f"Rate limited, retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(delay)
-                        continue
-                    else:
-                        print(f"Rate limit exceeded after {max_retries} attempts. Stopping.")
-                        raise
-                else:
-                    print(f"Error embedding chunk {i+1}: {e}")
-                    raise
-                    
-    return embeddings
+                print(f"Error embedding chunks {batch[0][0] + 1}-{batch[-1][0] + 1}: {e}")
+                raise
+            for (i, _), vector in zip(batch, vectors):
+                embeddings[i] = vector
+            done += len(batch)
+            print(f"Embedded chunks {done}/{total} ({len(batch)} in this request, "
+                  f"{self.rate:.1f} req/s, concurrency {self.controller.stats()['concurrency_limit']})")
+
+        tasks = [asyncio.ensure_future(run(batch)) for batch in iter_batches(texts)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # One batch failed for good: do not leave the others running
+            for task in tasks:
+                task.cancel()
+        return embeddings
+
+
+embedding_client = AsyncEmbeddingClient()
+
+
+async def embed_texts_async(texts: List[str], model: str = "mistral-embed") -> List[List[float]]:
+    client = embedding_client if model == embedding_client.model else AsyncEmbeddingClient(model)
+    return await client.embed(texts)
+
+
+def embed_texts(texts: List[str], model: str = "mistral-embed") -> List[List[float]]:
+    """
+    Calls Mistral embeddings API to transform each text into a vector using
+    the specified embedding model. Texts are sent in batches of up to
+    EMBED_BATCH_SIZE texts and EMBED_BATCH_MAX_TOKENS tokens, several at a
+    time (see AsyncEmbeddingClient). Vectors come back in input order, with []
+    for empty texts. Runs on the process's background loop, so it also works
+    when called from async code (e.g. an API handler).
+    """
+    future = asyncio.run_coroutine_threadsafe(embed_texts_async(texts, model), _background_loop())
+    try:
+        return future.result()
+    except BaseException:
+        future.cancel()  # Interrupted (e.g. Ctrl+C): do not leave the batches running
+        raise
@@ -1,10 +1,12 @@
 import os
-import time
+import asyncio
 from typing import List
 
 from dotenv import load_dotenv
 from mistralai import Mistral
 
+from app.rag.modules.rate_control import mistral_rate, status_code
+
 
 load_dotenv()
 _API_KEY = os.getenv("MISTRAL_API_KEY")
@@ -37,35 +39,24 @@ def generate_response(retrieved_chunks: List[str], question: str) -> str:
         {"role": "user", "content": user_prompt},
     ]
 
-    # Try different models with rate limiting
+    # Try different models; 429s are retried under the process-wide Mistral rate budget
     for model in _MODELS:
-        max_retries = 3
-        base_delay = 2.0
-        
-        for attempt in range(max_retries):
-            try:
-                print(f"Trying model: {model}")
-                resp = _client.chat.complete(model=model, messages=messages)
-                return resp.choices[0].message.content
-                
-            except Exception as e:
-                if "rate_limited" in str(e).lower() or "429" in str(e) or "capacity_exceeded" in str(e):
-                    if attempt < max_retries - 1:
-                        delay = base_delay * (2 ** attempt)
-                        print(f"Rate limited on {model}, retrying in {delay}s... (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(delay)
-                        continue
-                    else:
-                        print(f"Rate limit exceeded on {model}, trying next model...")
-                        break
-                else:
-                    print(f"Error with {model}: {e}")
-                    if model == _MODELS[-1]:  # Last model
-                        raise
-                    break
-        
-        # Wait before trying next model
-        if model != _MODELS[-1]:
-            time.sleep(3.0)
-    
+        try:
+            print(f"Trying model: {model}")
+            resp = mistral_rate.call(_client.chat.complete, model=model, messages=messages, retries=3)
+            return resp.choices[0].message.content
+
+        except Exception as e:
+            if status_code(e) in (429, 503):
+                print(f"{model} is rate limited or over capacity, trying next model...")
+                continue
+            print(f"Error with {model}: {e}")
+            if model == _MODELS[-1]:  # Last model
+                raise
+
     raise RuntimeError("All models are rate limited. Please try again later.")
+
+
+async def generate_response_async(retrieved_chunks: List[str], question: str) -> str:
+    """`generate_response` off the event loop, for async API handlers."""
+    return await asyncio.to_thread(generate_response, retrieved_chunks, question)
@@ -1,9 +1,20 @@
 import os
 import re
-from typing import List
+import time
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 import fitz  # PyMuPDF
 
+# Processes extracting PDFs in parallel (1 = extract in this process, one after another)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", 1))
+# Seconds one PDF may take in a worker before the worker is killed and the PDF skipped
+PDF_EXTRACT_TIMEOUT = float(os.getenv("PDF_EXTRACT_TIMEOUT", 120))
+
+_END = object()
+
 
 def clean_text_preserve_content(text: str) -> str:
     """
@@ -40,32 +51,197 @@ def extract_pdf_content_ordered(file_path: str) -> str:
     without deleting any information.
     """
     with fitz.open(file_path) as doc:
-        extracted_pages = []
+        return _extract_document_text(doc)
+
+
+def extract_pdf_content_from_bytes(data: bytes) -> str:
+    """
+    Same as `extract_pdf_content_ordered`, for a PDF already in memory
+    (e.g. downloaded from Spaces), so nothing has to be written to disk.
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return _extract_document_text(doc)
+
+
+def _extract_document_text(doc, verbose: bool = True) -> str:
+    extracted_pages = []
+
+    for page_num in range(len(doc)):
+        page = doc[page_num]
         
-        for page_num in range(len(doc)):
-            page = doc[page_num]
-            
-            # Extract the text from the page
-            page_text = page.get_text("text")
-            
-            # Clean only the noise (not the content)
-            cleaned_page_text = clean_text_preserve_content(page_text)
-            
-            if cleaned_page_text:
-                extracted_pages.append(cleaned_page_text)
-                print(f"  Page {page_num + 1}: {len(cleaned_page_text)} characters extracted")
-            else:
-                print(f"  Page {page_num + 1}: Empty page")
+        # Extract the text from the page
+        page_text = page.get_text("text")
+        
+        # Clean only the noise (not the content)
+        cleaned_page_text = clean_text_preserve_content(page_text)
         
-        # Join the pages in the correct order
-        full_text = "\n\n".join(extracted_pages)
-        return full_text
+        if cleaned_page_text:
+            extracted_pages.append(cleaned_page_text)
+            if verbose:
+                print(f"  Page {page_num + 1}: {len(cleaned_page_text)} characters extracted")
+        elif verbose:
+            print(f"  Page {page_num + 1}: Empty page")
+    
+    # Join the pages in the correct order
+    full_text = "\n\n".join(extracted_pages)
+    return full_text
 
 
-def load_pdfs_from_folder(folder_path: str, max_files: int = 5) -> List[str]:
+def _extraction_worker(conn) -> None:
+    """Worker process: extract the PDF paths sent over `conn`, one at a time, until None arrives."""
+    while True:
+        file_path = conn.recv()
+        if file_path is None:
+            return
+        try:
+            with fitz.open(file_path) as doc:
+                conn.send((_extract_document_text(doc, verbose=False), len(doc), None))
+        except Exception as e:
+            conn.send((None, 0, str(e)))
+
+
+class _ExtractionProcess:
+    """One worker process with its own pipe, so the PDF it is busy with is always known."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_extraction_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.index = None
+        self.deadline = None
+
+    def submit(self, index: int, file_path: str, timeout: float) -> None:
+        self.index = index
+        self.deadline = time.monotonic() + timeout
+        try:
+            self.conn.send(file_path)
+        except OSError:
+            pass  # The worker died; the pool notices through its sentinel
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join()
+
+
+def iter_extract_pdfs(
+    file_paths: Iterable[str],
+    workers: int = PDF_EXTRACT_WORKERS,
+    timeout: float = PDF_EXTRACT_TIMEOUT,
+    lookahead: Optional[int] = None,
+) -> Iterator[Tuple[Optional[str], int, Optional[str]]]:
+    """
+    Extract PDFs on one pool of `workers` processes kept for the whole run.
+
+    Yields one (text, page count, error) tuple per path, in the order of
+    `file_paths`, which is read lazily: at most `lookahead` PDFs (default
+    2 x workers) are being extracted or waiting to be consumed, so the workers
+    keep going while the consumer embeds what it already got. A PDF that
+    raises, crashes its worker (e.g. a MuPDF segfault) or takes longer than
+    `timeout` seconds gets an error instead of text; the worker is replaced
+    and the run carries on. Closing the generator stops the pool.
+    """
+    paths = iter(file_paths)
+    lookahead = max(workers, lookahead or 2 * workers)
+    queued = deque()  # (index, path) read but not yet sent to a worker
+    done = {}  # index -> result, extracted but not yet yielded
+    read = yielded = 0
+    exhausted = False
+    context = multiprocessing.get_context("spawn")  # Safe to call from threaded servers
+    pool: List[_ExtractionProcess] = []
+
+    try:
+        while True:
+            while not exhausted and read - yielded < lookahead:
+                path = next(paths, _END)
+                if path is _END:
+                    exhausted = True
+                else:
+                    queued.append((read, path))
+                    read += 1
+
+            if yielded in done:
+                yield done.pop(yielded)
+                yielded += 1
+                continue
+            if exhausted and yielded == read:
+                return
+
+            # Workers are started on demand, so a short run does not spawn the whole pool
+            idle = sum(1 for worker in pool if worker.index is None)
+            while len(pool) < workers and idle < len(queued):
+                pool.append(_ExtractionProcess(context))
+                idle += 1
+            for worker in pool:
+                if worker.index is None and queued:
+                    worker.submit(*queued.popleft(), timeout)
+
+            busy = [worker for worker in pool if worker.index is not None]
+            next_deadline = min(worker.deadline for worker in busy)
+            wait(
+                [worker.conn for worker in busy] + [worker.process.sentinel for worker in busy],
+                timeout=max(0.0, next_deadline - time.monotonic()),
+            )
+
+            for i, worker in enumerate(pool):
+                if worker.index is None:
+                    continue
+                if worker.conn.poll():
+                    try:
+                        done[worker.index] = worker.conn.recv()
+                        worker.index = None
+                        continue
+                    except (EOFError, OSError):
+                        error = "worker exited without a result"
+                elif not worker.process.is_alive():
+                    error = f"worker crashed (exit code {worker.process.exitcode})"
+                elif time.monotonic() >= worker.deadline:
+                    error = f"timed out after {timeout:g}s"
+                else:
+                    continue
+
+                done[worker.index] = (None, 0, error)
+                worker.kill()
+                pool[i] = _ExtractionProcess(context)
+    finally:
+        for worker in pool:
+            worker.stop()
+
+
+def extract_pdfs_parallel(
+    file_paths: List[str],
+    workers: int = PDF_EXTRACT_WORKERS,
+    timeout: float = PDF_EXTRACT_TIMEOUT,
+) -> List[Tuple[Optional[str], int, Optional[str]]]:
+    """
+    Extract several PDFs on a pool of `workers` processes (see
+    `iter_extract_pdfs`). Returns one (text, page count, error) tuple per
+    path, in the order of `file_paths`.
+    """
+    return list(iter_extract_pdfs(file_paths, workers, timeout, lookahead=len(file_paths)))
+
+
+def load_pdfs_from_folder(
+    folder_path: str,
+    max_files: int = 5,
+    workers: int = PDF_EXTRACT_WORKERS,
+    timeout: float = PDF_EXTRACT_TIMEOUT,
+) -> List[str]:
     """
     Load the PDFs and extract ALL the content without losing any information.
     Only the noise and special characters are removed.
+    With `workers` > 1 the PDFs are extracted in parallel processes (see
+    `extract_pdfs_parallel`); texts always come back in filename order.
     """
     if not os.path.isdir(folder_path):
         raise FileNotFoundError(f"Data folder not found: {folder_path}")
@@ -81,6 +257,9 @@ def load_pdfs_from_folder(folder_path: str, max_files: int = 5) -> List[str]:
             f"No PDF files found in {folder_path}. Please add at least one PDF."
         )
 
+    if workers > 1 and len(pdf_filenames) > 1:
+        return _load_pdfs_parallel(folder_path, pdf_filenames, workers, timeout)
+
     texts: List[str] = []
     for filename in pdf_filenames:
         file_path = os.path.join(folder_path, filename)
@@ -107,6 +286,31 @@ def load_pdfs_from_folder(folder_path: str, max_files: int = 5) -> List[str]:
     return texts
 
 
+def _load_pdfs_parallel(folder_path: str, pdf_filenames: List[str], workers: int, timeout: float) -> List[str]:
+    print(f"📄 Extracting {len(pdf_filenames)} PDFs with {workers} worker processes...")
+    start = time.perf_counter()
+    results = extract_pdfs_parallel(
+        [os.path.join(folder_path, filename) for filename in pdf_filenames], workers, timeout
+    )
+    elapsed = time.perf_counter() - start
+
+    texts: List[str] = []
+    total_pages = 0
+    for filename, (full_text, page_count, error) in zip(pdf_filenames, results):
+        total_pages += page_count
+        if full_text:
+            texts.append(full_text)
+            print(f"✅ {filename}: {len(full_text)} characters from {page_count} pages")
+        elif error:
+            print(f"❌ Error during the processing of {filename}: {error}")
+        else:
+            print(f"⚠️  No content extracted from {filename}")
+
+    failed = sum(1 for result in results if result[2])
+    print(f"⚡ {total_pages} pages in {elapsed:.2f}s ({total_pages / elapsed:,.1f} pages/sec), {failed} PDF(s) failed")
+    return texts
+
+
 def analyze_extracted_content(texts: List[str]) -> dict:
     """
     Analyze the extracted content to check the quality
@@ -0,0 +1,182 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from app.metrics import registry
+from app.scraper.rate_limiter import parse_retry_after
+
+MISTRAL_INITIAL_CONCURRENCY = int(os.getenv("MISTRAL_INITIAL_CONCURRENCY", 2))  # In-flight requests to start from
+MISTRAL_MAX_CONCURRENCY = int(os.getenv("MISTRAL_MAX_CONCURRENCY", 16))  # Ceiling for in-flight requests of this process
+MISTRAL_MAX_RETRIES = int(os.getenv("MISTRAL_MAX_RETRIES", 6))  # Attempts per request when throttled
+THROTTLE_BACKOFF = 1.0  # First pause after a 429 without Retry-After, doubled while they keep coming
+MAX_THROTTLE_PAUSE = 60.0
+RATE_WINDOW = 30.0  # Seconds over which the current request rate is measured
+POLL_INTERVAL = 0.05
+
+MISTRAL_REQUESTS = registry.counter("mistral_requests_total", "Mistral API requests sent")
+MISTRAL_THROTTLED = registry.counter("mistral_throttled_total", "Mistral API requests answered with 429")
+MISTRAL_CONCURRENCY = registry.gauge("mistral_concurrency_limit", "In-flight Mistral requests currently allowed")
+
+
+def status_code(error: Exception) -> Optional[int]:
+    return getattr(error, "status_code", None)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Retry-After of the error's HTTP response (seconds or an HTTP date), if any."""
+    response = getattr(error, "raw_response", None)
+    return parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+
+
+class AdaptiveRateController:
+    """
+    AIMD limit on in-flight requests to one API, shared by every thread and
+    event loop of the process (and only of this process: other containers
+    calling the same API have their own, see MISTRAL_MAX_CONCURRENCY). Each success raises the limit by 1/limit (about
+    +1 per round of requests); a 429 halves it, once per throttling episode,
+    and pauses every caller for Retry-After seconds, or an exponential backoff
+    when the header is missing.
+    """
+
+    def __init__(self, initial: int = MISTRAL_INITIAL_CONCURRENCY, maximum: int = MISTRAL_MAX_CONCURRENCY,
+                 max_retries: int = MISTRAL_MAX_RETRIES):
+        self.maximum = max(1, maximum)
+        self.limit = float(min(max(1, initial), self.maximum))
+        self.max_retries = max_retries
+        self.in_flight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.paused_until = 0.0
+        self._consecutive_throttles = 0
+        self._completed = deque()
+        self._lock = threading.Lock()
+        MISTRAL_CONCURRENCY.set(int(self.limit))
+
+    def _try_acquire(self) -> float:
+        """Take a slot and return 0, or return how long to wait before trying again."""
+        with self._lock:
+            now = time.time()
+            if now < self.paused_until:
+                return self.paused_until - now
+            if self.in_flight >= int(self.limit):
+                return POLL_INTERVAL
+            self.in_flight += 1
+            self.requests += 1
+        MISTRAL_REQUESTS.inc()
+        return 0.0
+
+    def acquire(self):
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            time.sleep(min(wait, 1.0))
+
+    async def acquire_async(self):
+        while True:
+            wait = self._try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(min(wait, 1.0))
+
+    def release(self, success: bool = True):
+        with self._lock:
+            self.in_flight -= 1
+            if success:
+                self._consecutive_throttles = 0
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+                now = time.time()
+                self._completed.append(now)
+                while self._completed and self._completed[0] < now - RATE_WINDOW:
+                    self._completed.popleft()
+            limit = int(self.limit)
+        MISTRAL_CONCURRENCY.set(limit)
+
+    def throttle(self, retry_after: Optional[float] = None) -> float:
+        """Record a 429 for a request holding a slot; returns the pause every caller now observes."""
+        with self._lock:
+            self.in_flight -= 1
+            self.throttled += 1
+            now = time.time()
+            # Requests already in flight when the limit was hit fail together: one decrease for all of them
+            if now >= self.paused_until:
+                self.limit = max(1.0, self.limit / 2)
+                self._consecutive_throttles += 1
+            if retry_after is None:
+                retry_after = THROTTLE_BACKOFF * 2 ** (self._consecutive_throttles - 1)
+            pause = min(retry_after, MAX_THROTTLE_PAUSE)
+            self.paused_until = max(self.paused_until, now + pause)
+            limit = int(self.limit)
+        MISTRAL_THROTTLED.inc()
+        MISTRAL_CONCURRENCY.set(limit)
+        return pause
+
+    def _throttled(self, error: Exception, attempt: int, attempts: int, name: str) -> bool:
+        """Handle a failed attempt: True to retry it, False to re-raise the error."""
+        if status_code(error) != 429:
+            self.release(success=False)
+            return False
+        pause = self.throttle(retry_after_seconds(error))
+        if attempt == attempts - 1:
+            print(f"Rate limit exceeded after {attempts} attempts ({name}). Stopping.")
+            return False
+        print(f"Rate limited ({name}), pausing {pause:.1f}s; concurrency now {int(self.limit)} "
+              f"(attempt {attempt + 1}/{attempts})")
+        return True
+
+    def call(self, fn: Callable, *args, retries: Optional[int] = None, **kwargs) -> Any:
+        """Run `fn` under the shared limit, retrying it while the API answers 429."""
+        attempts = retries or self.max_retries
+        for attempt in range(attempts):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if self._throttled(e, attempt, attempts, getattr(fn, "__name__", "request")):
+                    continue
+                raise
+            self.release()
+            return result
+
+    async def call_async(self, fn: Callable, *args, retries: Optional[int] = None, **kwargs) -> Any:
+        """Async `call` for coroutine functions such as the SDK's *_async methods."""
+        attempts = retries or self.max_retries
+        for attempt in range(attempts):
+            await self.acquire_async()
+            try:
+                result = await fn(*args, **kwargs)
+            except asyncio.CancelledError:
+                self.release(success=False)
+                raise
+            except Exception as e:
+                if self._throttled(e, attempt, attempts, getattr(fn, "__name__", "request")):
+                    continue
+                raise
+            self.release()
+            return result
+
+    def rate(self) -> float:
+        """Successful requests per second over the last RATE_WINDOW seconds."""
+        with self._lock:
+            now = time.time()
+            recent = sum(1 for t in self._completed if t >= now - RATE_WINDOW)
+        return recent / RATE_WINDOW
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "requests_per_sec": round(self.rate(), 2),
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "paused_for": round(max(0.0, self.paused_until - time.time()), 1),
+        }
+
+
+# One budget for every Mistral call of this process. Each service (API, indexer,
+# ingestion) runs its own, so the key's limit is split across them with
+# MISTRAL_MAX_CONCURRENCY (see the compose files)
+mistral_rate = AdaptiveRateController()
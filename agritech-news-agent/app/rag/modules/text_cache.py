@@ -0,0 +1,80 @@
+import os
+import gzip
+import hashlib
+import tempfile
+from typing import Optional
+
+from app.rag.modules.ingestion import extract_pdf_content_ordered
+
+# Where extracted PDF texts are cached; defaults to <data dir>/.text_cache
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR")
+
+
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ExtractedTextCache:
+    """
+    Extracted text on disk, keyed by the SHA-256 of the PDF bytes, as
+    <directory>/<hash[:2]>/<hash>.txt.gz. Keying by content (not by name or
+    mtime) means a renamed, copied or re-downloaded PDF is never extracted twice.
+    Entries are written to a temp file and renamed, so a crash never leaves a
+    truncated entry behind.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, content_hash: str) -> str:
+        return os.path.join(self.directory, content_hash[:2], f"{content_hash}.txt.gz")
+
+    def get(self, content_hash: str) -> Optional[str]:
+        try:
+            with gzip.open(self.path_for(content_hash), "rt", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError) as e:
+            print(f"⚠️ Ignoring unreadable text cache entry {content_hash[:8]}...: {e}")
+            return None
+
+    def put(self, content_hash: str, text: str) -> None:
+        path = self.path_for(content_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as f:
+                f.write(text.encode("utf-8"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def extract(self, file_path: str) -> str:
+        """Text of one PDF, from the cache when these bytes were extracted before."""
+        content_hash = file_sha256(file_path)
+        text = self.get(content_hash)
+        if text is not None:
+            self.hits += 1
+            print(f"♻️ Cached text for {os.path.basename(file_path)} ({len(text)} characters)")
+            return text
+
+        self.misses += 1
+        text = extract_pdf_content_ordered(file_path)
+        if text:
+            try:
+                self.put(content_hash, text)
+            except OSError as e:
+                print(f"⚠️ Could not cache the text of {os.path.basename(file_path)}: {e}")
+        return text
+
+
+def text_cache_for(data_dir: str) -> ExtractedTextCache:
+    return ExtractedTextCache(TEXT_CACHE_DIR or os.path.join(data_dir, ".text_cache"))
@@ -1,9 +1,10 @@
 from typing import List, Sequence, Dict, Any
 import os
+import uuid
 import hashlib
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct
+from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
 
 
 _COLLECTION_NAME = "rag_collection"
@@ -44,6 +45,115 @@ def ensure_collection(client: QdrantClient, vector_size: int) -> None:
     )
 
 
+def ensure_collection_exists(client: QdrantClient, vector_size: int) -> None:
+    """Create the collection if it is missing. Unlike `ensure_collection`, never drops indexed points."""
+    if not client.collection_exists(_COLLECTION_NAME):
+        client.create_collection(
+            collection_name=_COLLECTION_NAME,
+            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+        )
+
+
+def _document_filter(document_hash: str) -> Filter:
+    return Filter(must=[FieldCondition(key="document_hash", match=MatchValue(value=document_hash))])
+
+
+def is_document_indexed(client: QdrantClient, document_hash: str) -> bool:
+    """Whether any chunk of the document is already in the collection."""
+    if not client.collection_exists(_COLLECTION_NAME):
+        return False
+    return client.count(
+        collection_name=_COLLECTION_NAME,
+        count_filter=_document_filter(document_hash),
+        exact=True,
+    ).count > 0
+
+
+def delete_article_points(client: QdrantClient, article_id: str, keep_hash: str = None) -> None:
+    """
+    Delete the chunks stored for `article_id` under any other document hash
+    than `keep_hash`: a new version of an article's PDF gets a new hash, and
+    the old version's chunks would otherwise stay searchable next to it.
+    """
+    if not client.collection_exists(_COLLECTION_NAME):
+        return
+    must_not = [FieldCondition(key="document_hash", match=MatchValue(value=keep_hash))] if keep_hash else None
+    client.delete(
+        collection_name=_COLLECTION_NAME,
+        points_selector=Filter(
+            must=[FieldCondition(key="article_id", match=MatchValue(value=article_id))],
+            must_not=must_not,
+        ),
+    )
+
+
+def is_document_complete(client: QdrantClient, document_hash: str) -> bool:
+    """
+    Whether every chunk of the document is in the collection, judged by the
+    `chunks_total` stored on its chunks. Documents indexed without it count
+    as complete as soon as one chunk is there.
+    """
+    if not client.collection_exists(_COLLECTION_NAME):
+        return False
+    points = client.scroll(
+        collection_name=_COLLECTION_NAME,
+        scroll_filter=_document_filter(document_hash),
+        limit=1,
+        with_payload=True,
+    )[0]
+    if not points:
+        return False
+    expected = points[0].payload.get("chunks_total")
+    return expected is None or client.count(
+        collection_name=_COLLECTION_NAME,
+        count_filter=_document_filter(document_hash),
+        exact=True,
+    ).count >= expected
+
+
+def _chunk_point_id(document_hash: str, chunk_index: int) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{document_hash}:{chunk_index}"))
+
+
+def upsert_chunk_batch(
+    client: QdrantClient,
+    embeddings: Sequence[Sequence[float]],
+    chunks: Sequence[Dict[str, Any]]
+) -> int:
+    """
+    Upsert chunks that may come from several documents. Each chunk is a dict
+    with at least `text`, `document_hash` and `chunk_index`; all its fields
+    become the payload. Ids are derived from the document hash and chunk
+    index, so writing a chunk twice overwrites it. Returns the points written.
+    """
+    points = [
+        PointStruct(id=_chunk_point_id(chunk["document_hash"], chunk["chunk_index"]), vector=emb, payload=dict(chunk))
+        for emb, chunk in zip(embeddings, chunks)
+    ]
+    client.upsert(collection_name=_COLLECTION_NAME, points=points)
+    return len(points)
+
+
+def upsert_document_chunks(
+    client: QdrantClient,
+    document_hash: str,
+    embeddings: Sequence[Sequence[float]],
+    chunks: Sequence[str],
+    payload: Dict[str, Any] = None
+) -> int:
+    """
+    Upsert the chunks of one document under ids derived from its hash and the
+    chunk index, so re-indexing the same document overwrites its points instead
+    of duplicating them. `payload` (e.g. the article id and title) is stored on
+    every chunk. Returns the number of points written.
+    """
+    return upsert_chunk_batch(client, embeddings, [
+        {**(payload or {}), "text": chunk, "document_hash": document_hash,
+         "chunk_index": i, "chunks_total": len(chunks)}
+        for i, chunk in enumerate(chunks)
+    ])
+
+
 def get_existing_documents(client: QdrantClient) -> Dict[str, List[int]]:
     """
     Retrieve the list of already indexed documents with their chunk IDs.
@@ -1 +1,310 @@
-# FastAPI endpoint for scraping articles
\ No newline at end of file
+import os
+import sys
+import json
+import time
+import uuid
+import queue
+import asyncio
+import threading
+import contextvars
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.scraper.main import build_search_url
+from app.metrics import registry
+from app.scraper.scraper import scrape
+
+SCRAPER_API_WORKERS = int(os.getenv("SCRAPER_API_WORKERS", 2))  # Jobs running at the same time
+SCRAPER_API_QUEUE_SIZE = int(os.getenv("SCRAPER_API_QUEUE_SIZE", 10))  # Jobs waiting before submit is refused
+JOB_HISTORY = 100  # Finished jobs kept for GET /jobs
+JOB_EVENT_HISTORY = 1000  # Log lines kept per job for late SSE subscribers
+SSE_POLL_INTERVAL = 0.5
+SSE_KEEPALIVE_EVERY = 15
+
+_current_job = contextvars.ContextVar("current_job", default=None)
+
+
+class _JobStdout:
+    """
+    Tee for sys.stdout: every line the scraper prints is still written to the
+    process output, and is also recorded on the job running in the current
+    context. asyncio tasks and `asyncio.to_thread` inherit the context, and the
+    PDF pipeline copies it into its workers, so their output is routed too.
+    Installed for the lifetime of the app only (see `lifespan`).
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        job = _current_job.get()
+        if job is not None:
+            job.write(text)
+        return self._stream.write(text)
+
+    def flush(self):
+        self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class Job:
+    def __init__(self, request, query_url):
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.query_url = query_url
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+        self.result = None
+        self._events = deque(maxlen=JOB_EVENT_HISTORY)
+        self._next_event_id = 0
+        self._partial = ""
+        self._lock = threading.Lock()
+        self._emit("status", {"status": self.status})
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    def _emit(self, event, data):
+        self._events.append({"id": self._next_event_id, "event": event, "data": data})
+        self._next_event_id += 1
+
+    def write(self, text):
+        with self._lock:
+            lines = (self._partial + text).split("\n")
+            self._partial = lines.pop()
+            for line in lines:
+                if line.strip():
+                    self._emit("log", {"line": line})
+
+    def start(self):
+        with self._lock:
+            self.status = "running"
+            self.started_at = time.time()
+            self._emit("status", {"status": self.status})
+
+    def finish(self, status, result=None, error=None):
+        with self._lock:
+            if self._partial.strip():
+                self._emit("log", {"line": self._partial})
+            self._partial = ""
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self._emit("status", {"status": status, "error": error, "result": result})
+
+    def events_since(self, cursor):
+        """Return (events with id >= cursor, next cursor, True once the final event was returned)."""
+        with self._lock:
+            events = [event for event in self._events if event["id"] >= cursor]
+            return events, self._next_event_id, self.finished
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "query_url": self.query_url,
+            "request": self.request.model_dump(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class DuplicateJobError(Exception):
+    def __init__(self, job):
+        super().__init__(f"A job for this query is already {job.status}: {job.id}")
+        self.job = job
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobManager:
+    """
+    Runs scrape jobs on `workers` threads fed by a bounded queue.
+
+    At most one job per search URL is queued or running at a time, since two
+    crawls of the same query would fight over the same `crawl_state` cursor.
+    When `max_queue` jobs are already waiting, `submit()` refuses new ones
+    instead of piling them up.
+    """
+
+    def __init__(self, workers: int = SCRAPER_API_WORKERS, max_queue: int = SCRAPER_API_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = OrderedDict()
+        self._active = {}  # query_url -> job
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"scrape-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, request) -> Job:
+        query_url = build_search_url(request.query, newest=request.newest)
+        with self._lock:
+            active = self._active.get(query_url)
+            if active is not None:
+                raise DuplicateJobError(active)
+            job = Job(request, query_url)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(f"{self._queue.maxsize} jobs are already waiting")
+            self._active[query_url] = job
+            self._jobs[job.id] = job
+            self._prune()
+        print(f"📥 Queued scrape job {job.id} for {query_url}")
+        return job
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            token = _current_job.set(job)
+            job.start()
+            try:
+                # Jobs run side by side: each one's summary counts only its own pages, inserts and PDFs
+                with registry.run():
+                    result = run_job(job.request, job.query_url)
+                job.finish("succeeded", result=result)
+            except Exception as e:
+                print(f"❌ Scrape job {job.id} failed: {e}")
+                job.finish("failed", error=str(e))
+            finally:
+                _current_job.reset(token)
+                with self._lock:
+                    self._active.pop(job.query_url, None)
+                self._queue.task_done()
+
+
+def run_job(request, query_url):
+    if request.async_mode:
+        from app.scraper.crawler import scrape_async
+        return scrape_async(query_url, total_articles=request.limit,
+                            continue_mode=request.continue_mode, newest=request.newest)
+    return scrape(query_url, total_articles=request.limit,
+                  continue_mode=request.continue_mode, newest=request.newest)
+
+
+# ---------- Schemas ----------
+class ScrapeJobRequest(BaseModel):
+    query: str = Field("agriculture", min_length=1)
+    limit: int = Field(25, gt=0)
+    newest: bool = False
+    continue_mode: bool = False
+    async_mode: bool = False
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing this module has no side effects: the stdout tee and the job
+    # workers only exist while the app is served
+    stdout = sys.stdout
+    sys.stdout = _JobStdout(stdout)
+    app.state.jobs = JobManager()
+    try:
+        yield
+    finally:
+        sys.stdout = stdout
+
+
+app = FastAPI(title="Scraper API", lifespan=lifespan)
+
+
+def _jobs() -> JobManager:
+    return app.state.jobs
+
+
+def _get_job(job_id) -> Job:
+    job = _jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+# ---------- Jobs ----------
+@app.post("/jobs", status_code=202)
+async def create_job(request: ScrapeJobRequest) -> Dict[str, Any]:
+    try:
+        return _jobs().submit(request).to_dict()
+    except DuplicateJobError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "job_id": e.job.id})
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Job queue is full: {e}")
+
+@app.get("/jobs")
+async def list_jobs() -> List[Dict[str, Any]]:
+    return [job.to_dict() for job in _jobs().list()]
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    return _get_job(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events: the job's output lines ("log") and state changes
+    ("status"), replayed from the start, until the job finishes.
+    Reconnecting clients resume after `Last-Event-ID`.
+    """
+    job = _get_job(job_id)
+    last_event_id = request.headers.get("last-event-id", "")
+    cursor = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
+    async def stream():
+        nonlocal cursor
+        idle = 0.0
+        while True:
+            events, cursor, finished = job.events_since(cursor)
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if finished or await request.is_disconnected():
+                return
+            idle = 0.0 if events else idle + SSE_POLL_INTERVAL
+            if idle >= SSE_KEEPALIVE_EVERY:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(SSE_POLL_INTERVAL)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ---------- Metrics ----------
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    return registry.render()
+
+# ---------- Health ----------
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
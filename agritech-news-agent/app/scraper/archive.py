@@ -0,0 +1,76 @@
+import os
+import gzip
+import json
+import zlib
+import threading
+from datetime import datetime
+
+# Directory for the raw search page archive; empty disables archiving
+PAGE_ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR", "")
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched search pages, one gzip-compressed JSON line
+    per page ({"url", "fetched_at", "html"}) in <directory>/pages-YYYYMMDD.jsonl.gz.
+
+    Every page is appended as its own gzip member, so a crash can at worst
+    truncate the last page and never corrupts what is already on disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def path_for(self, when):
+        return os.path.join(self.directory, f"pages-{when:%Y%m%d}.jsonl.gz")
+
+    def append(self, url, body):
+        now = datetime.now()
+        html = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else body
+        line = json.dumps({"url": url, "fetched_at": now.isoformat(timespec="seconds"), "html": html})
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with gzip.open(self.path_for(now), "ab") as f:
+                f.write(line.encode("utf-8") + b"\n")
+
+
+page_archive = PageArchive(PAGE_ARCHIVE_DIR) if PAGE_ARCHIVE_DIR else None
+
+
+def archive_page(url, body):
+    """Record a fetched page when archiving is enabled. Never fails the crawl."""
+    if page_archive is None:
+        return
+    try:
+        page_archive.append(url, body)
+    except OSError as e:
+        print(f"⚠️ Could not archive {url}: {e}")
+
+
+def archive_files(path):
+    """The archive files at `path`: the file itself, or every *.jsonl.gz in a directory, oldest first."""
+    if os.path.isdir(path):
+        return [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if name.endswith(".jsonl.gz")
+        ]
+    return [path]
+
+
+def iter_archive(path):
+    """
+    Yield the archived page records under `path` in the order they were fetched.
+    A page truncated by a crash at the end of a file is skipped.
+    """
+    for file_path in archive_files(path):
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"⚠️ Skipping a truncated record in {file_path}")
+            except (EOFError, zlib.error, gzip.BadGzipFile):
+                print(f"⚠️ {file_path} ends with an incomplete page; skipped it")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Search page parser micro-benchmark
+Compares the legacy BeautifulSoup path (html.parser, parse_article called twice
+per result) with the lxml parse-once path (parse_search_page) over saved arXiv
+search pages, and checks that both produce the same article dicts.
+
+Usage:
+    python app/scraper/benchmark_parser.py <pages_dir> [repeat]
+    python app/scraper/benchmark_parser.py <pages_dir> --download N   # save N search pages first
+    python app/scraper/benchmark_parser.py <pages-YYYYMMDD.jsonl.gz> [repeat]   # pages from the raw page archive
+"""
+
+import os
+import sys
+import time
+import requests
+from bs4 import BeautifulSoup
+from app.scraper.archive import iter_archive
+from app.scraper.scraper import PAGE_SIZE, rate_limiter, parse_article, parse_search_page
+
+DEFAULT_URL = "https://arxiv.org/search/?searchtype=all&query=agriculture&abstracts=show&order=-submitted_date"
+
+
+def parse_page_legacy(page_html):
+    """The pre-lxml path, kept verbatim as the baseline."""
+    soup = BeautifulSoup(page_html, "html.parser")
+    results = soup.find_all("li", class_="arxiv-result")
+    return [parse_article(article) for article in results if parse_article(article) is not None]
+
+
+def download_pages(pages_dir, count, base_url=DEFAULT_URL):
+    os.makedirs(pages_dir, exist_ok=True)
+    for page in range(count):
+        paged_url = f"{base_url}&size={PAGE_SIZE}&start={page * PAGE_SIZE}"
+        rate_limiter.wait(paged_url)
+        response = requests.get(paged_url, timeout=60)
+        response.raise_for_status()
+        with open(os.path.join(pages_dir, f"page_{page:04d}.html"), "wb") as f:
+            f.write(response.content)
+        print(f"💾 Saved page {page + 1}/{count}")
+
+
+def load_pages(pages_dir):
+    if pages_dir.endswith(".jsonl.gz"):
+        return [record["html"].encode("utf-8") for record in iter_archive(pages_dir)]
+    pages = []
+    for filename in sorted(os.listdir(pages_dir)):
+        if filename.endswith((".html", ".htm")):
+            with open(os.path.join(pages_dir, filename), "rb") as f:
+                pages.append(f.read())
+    return pages
+
+
+def run(name, parse, pages, repeat):
+    articles = 0
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            articles += len(parse(page))
+    elapsed = time.perf_counter() - start
+    rate = articles / elapsed if elapsed else float("inf")
+    print(f"  {name:<28} {articles:>7} articles in {elapsed:7.3f}s  →  {rate:,.0f} articles/sec")
+    return rate
+
+
+def benchmark(pages_dir, repeat=5):
+    pages = load_pages(pages_dir)
+    if not pages:
+        print(f"❌ No saved search pages (*.html) in {pages_dir}")
+        return None
+
+    print(f"🧪 Checking both parsers agree on {len(pages)} page(s)...")
+    mismatches = 0
+    for i, page in enumerate(pages):
+        legacy = parse_page_legacy(page)
+        fast = parse_search_page(page)[1]
+        if legacy != fast:
+            mismatches += 1
+            print(f"⚠️  Page {i + 1}: parsers disagree ({len(legacy)} vs {len(fast)} articles)")
+    print("✅ Identical output" if not mismatches else f"❌ {mismatches} page(s) differ")
+
+    print(f"\n⏱️  Parsing {len(pages)} page(s) x {repeat}:")
+    legacy_rate = run("BeautifulSoup (legacy)", parse_page_legacy, pages, repeat)
+    fast_rate = run("lxml parse-once", lambda page: parse_search_page(page)[1], pages, repeat)
+    print(f"\n🚀 Speed-up: {fast_rate / legacy_rate:.1f}x")
+    return {"legacy_articles_per_sec": legacy_rate, "fast_articles_per_sec": fast_rate, "mismatches": mismatches}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python app/scraper/benchmark_parser.py <pages_dir> [repeat] [--download N]")
+        sys.exit(1)
+
+    pages_dir = args[0]
+    repeat = 5
+    i = 1
+    while i < len(args):
+        if args[i] == "--download" and i + 1 < len(args):
+            download_pages(pages_dir, int(args[i + 1]))
+            i += 2
+        elif args[i].isdigit():
+            repeat = int(args[i])
+            i += 1
+        else:
+            print(f"❌ Unknown argument: {args[i]}")
+            sys.exit(1)
+
+    benchmark(pages_dir, repeat)
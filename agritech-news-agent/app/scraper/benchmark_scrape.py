@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+End-to-end scraper benchmark, fully offline
+Serves recorded search pages (a pages directory or a raw page archive) and PDFs
+from a local HTTP server, stores PDFs in an in-process S3 stand-in (moto) and
+writes to a dedicated local Postgres database, then runs `scrape()` (or the
+async crawler) from scratch with the rate limit lifted.
+
+Reports pages/sec, articles/sec, bytes/sec and the time spent in each stage,
+and writes everything to a JSON file so runs can be compared.
+
+Usage:
+    python app/scraper/benchmark_scrape.py <pages_dir | pages-YYYYMMDD.jsonl.gz> [limit]
+        [--async] [--pdfs=DIR] [--pdf-size=KB] [--no-pdfs] [--output=FILE]
+
+Needs `pip install moto` unless --no-pdfs is given. The articles of the
+benchmark database (BENCHMARK_POSTGRES_DB, default "<POSTGRES_DB>_benchmark")
+are wiped before every run; it must not be the main database.
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BENCHMARK_DIR = "logs/benchmarks"
+BENCHMARK_BUCKET = "agritech-benchmark"
+EMPTY_PAGE = b"<html><body><ol class='breathe-horizontal'></ol></body></html>"
+STAGES = {
+    "page_fetch": "scraper_page_fetch_seconds",
+    "page_parse": "scraper_page_parse_seconds",
+    "db_write": "scraper_db_write_seconds",
+    "pdf_download": "scraper_pdf_download_seconds",
+    "pdf_upload": "scraper_pdf_upload_seconds",
+}
+
+
+class FixtureServer:
+    """
+    Local stand-in for arxiv.org: /search/?...&start=N returns recorded page
+    N // page_size (an empty result page past the end), /pdf/<id> returns a PDF.
+    Each article gets distinct bytes, so content-addressed uploads are not
+    skipped as duplicates.
+    """
+
+    def __init__(self, pdfs, pages=(), page_size=25):
+        self.pdfs = pdfs
+        self.pages = list(pages)
+        self.page_size = page_size
+        self.bytes_served = {"pages": 0, "pdfs": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def _handler(self):
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/search"):
+                    start = int(parse_qs(url.query).get("start", ["0"])[0])
+                    body = fixtures.page(start // fixtures.page_size)
+                    kind, content_type = "pages", "text/html; charset=utf-8"
+                elif url.path.startswith("/pdf/"):
+                    body = fixtures.pdf(url.path[len("/pdf/"):])
+                    kind, content_type = "pdfs", "application/pdf"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with fixtures._lock:
+                    fixtures.bytes_served[kind] += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def page(self, index):
+        return self.pages[index] if index < len(self.pages) else EMPTY_PAGE
+
+    def pdf(self, arxiv_id):
+        base = self.pdfs[zlib.crc32(arxiv_id.encode("utf-8")) % len(self.pdfs)]
+        return base + f"\n% {arxiv_id}\n".encode("utf-8")
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def load_pdfs(pdf_dir=None, pdf_size_kb=500):
+    """PDF bodies from `pdf_dir`, or one synthetic body of `pdf_size_kb` KB."""
+    if pdf_dir:
+        pdfs = []
+        for filename in sorted(os.listdir(pdf_dir)):
+            if filename.lower().endswith(".pdf"):
+                with open(os.path.join(pdf_dir, filename), "rb") as f:
+                    pdfs.append(f.read())
+        if pdfs:
+            return pdfs
+        print(f"⚠️ No PDFs in {pdf_dir}, using synthetic ones")
+    filler = b"0 0 0 RG 72 720 Td (agritech benchmark) Tj\n"
+    body = b"%PDF-1.4\n" + filler * (pdf_size_kb * 1024 // len(filler))
+    return [body + b"%%EOF"]
+
+
+def prepare_database():
+    """Point app.db at the benchmark database (created if missing) and empty it."""
+    import psycopg2
+    from app.config import POSTGRES
+
+    database = os.getenv("BENCHMARK_POSTGRES_DB", f"{POSTGRES['database']}_benchmark")
+    if database == POSTGRES["database"]:
+        raise SystemExit(f"❌ BENCHMARK_POSTGRES_DB must not be the main database ({database})")
+
+    conn = psycopg2.connect(
+        host=POSTGRES["host"], port=POSTGRES["port"], user=POSTGRES["user"],
+        password=POSTGRES["password"], dbname=POSTGRES["database"],
+    )
+    conn.autocommit = True
+    with conn.cursor() as cur:
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (database,))
+        if not cur.fetchone():
+            cur.execute(f'CREATE DATABASE "{database}";')
+            print(f"🗄️ Created benchmark database {database}")
+    conn.close()
+    POSTGRES["database"] = database
+
+    from app.db import CRAWL_STATE_TABLE, QUERY_MATCHES_TABLE, TABLE_NAME, connection, init_db
+    init_db()
+    with connection() as conn, conn.cursor() as cur:
+        cur.execute(f"TRUNCATE {TABLE_NAME}, {CRAWL_STATE_TABLE}, {QUERY_MATCHES_TABLE} RESTART IDENTITY;")
+    return database
+
+
+def stage_report(metrics):
+    stages = {}
+    for stage, name in STAGES.items():
+        histogram = metrics.get(name) or {}
+        stages[stage] = {
+            "seconds": histogram.get("sum", 0.0),
+            "count": histogram.get("count", 0),
+            "mean": histogram.get("mean"),
+            "p95": histogram.get("p95"),
+        }
+    return stages
+
+
+def benchmark(pages_source, limit=None, async_mode=False, with_pdfs=True, pdf_dir=None,
+              pdf_size_kb=500, output=None):
+    # Configuration is read from the environment at import time, so set it
+    # before the first app.scraper import
+    os.environ.update({
+        "SCRAPER_RATE": "1000000",
+        "SCRAPER_BURST": "1000000",
+        "PAGE_ARCHIVE_DIR": "",
+        "METRICS_DIR": "",
+        "METRICS_PORT": "0",
+        "S3_UPLOAD": "true" if with_pdfs else "false",
+    })
+    if with_pdfs:
+        try:
+            from moto import mock_aws
+        except ImportError:
+            raise SystemExit("❌ moto is needed for the S3 stand-in: pip install moto (or run with --no-pdfs)")
+        os.environ.update({
+            "SPACES_KEY": "benchmark", "SPACES_SECRET": "benchmark", "SPACES_REGION": "us-east-1",
+            "SPACES_BUCKET": BENCHMARK_BUCKET, "SPACES_ENDPOINT": "https://s3.amazonaws.com",
+        })
+        s3_mock = mock_aws()
+        s3_mock.start()
+
+    # PDF links in the parsed articles must point at the fixture server too
+    server = FixtureServer(load_pdfs(pdf_dir, pdf_size_kb)).start()
+    os.environ["ARXIV_BASE_URL"] = server.url
+
+    try:
+        from app.scraper.benchmark_parser import load_pages
+        from app.scraper.scraper import PAGE_SIZE, scrape
+        from app.scraper.uploader import s3
+
+        server.pages = load_pages(pages_source)
+        server.page_size = PAGE_SIZE
+        pages = server.pages
+        if not pages:
+            print(f"❌ No recorded search pages in {pages_source}")
+            return None
+
+        database = prepare_database()
+        if with_pdfs:
+            s3.create_bucket(Bucket=BENCHMARK_BUCKET)
+
+        limit = limit or len(pages) * PAGE_SIZE
+        base_url = f"{server.url}/search/?searchtype=all&query=agriculture&abstracts=show&order=submitted_date"
+        print(f"🏁 Benchmarking {'async crawler' if async_mode else 'scrape()'} over {len(pages)} recorded "
+              f"page(s), limit {limit}, PDFs {'on' if with_pdfs else 'off'} ({server.url})")
+
+        start = time.perf_counter()
+        if async_mode:
+            from app.scraper.crawler import scrape_async
+            summary = scrape_async(base_url, total_articles=limit)
+        else:
+            summary = scrape(base_url, total_articles=limit)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.stop()
+        if with_pdfs:
+            s3_mock.stop()
+
+    metrics = summary["metrics"] if summary else {}
+    pages_fetched = metrics.get("scraper_pages_fetched_total", 0)
+    articles = metrics.get("scraper_articles_inserted_total", 0)
+    total_bytes = sum(server.bytes_served.values())
+    report = {
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "mode": "async" if async_mode else "sync",
+            "fixtures": pages_source,
+            "recorded_pages": len(pages),
+            "limit": limit,
+            "pdfs": with_pdfs,
+            "database": database,
+            "env": {name: os.getenv(name) for name in (
+                "SCRAPER_CONCURRENCY", "PDF_WORKERS", "PDF_QUEUE_SIZE", "ARTICLE_BATCH_SIZE", "POSTGRES_POOL_MAX",
+            )},
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "pages": pages_fetched,
+        "articles": articles,
+        "bytes": dict(server.bytes_served, total=total_bytes),
+        "pages_per_sec": round(pages_fetched / elapsed, 3),
+        "articles_per_sec": round(articles / elapsed, 3),
+        "bytes_per_sec": round(total_bytes / elapsed, 1),
+        "stages": stage_report(metrics),
+        "run": summary,
+    }
+
+    print(f"\n📊 Benchmark ({report['config']['mode']}): {elapsed:.2f}s")
+    print(f"  {report['pages_per_sec']:>12,.1f} pages/sec")
+    print(f"  {report['articles_per_sec']:>12,.1f} articles/sec")
+    print(f"  {report['bytes_per_sec'] / 1024 / 1024:>12,.2f} MiB/sec ({total_bytes:,} bytes)")
+    for stage, values in report["stages"].items():
+        print(f"  {stage:<12} {values['seconds']:>8.3f}s over {values['count']} call(s)")
+
+    output = output or os.path.join(BENCHMARK_DIR, f"scrape_{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📝 Results written to {output}")
+    return report
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0].startswith("--"):
+        print("Usage: python app/scraper/benchmark_scrape.py <pages_dir | archive.jsonl.gz> [limit] "
+              "[--async] [--pdfs=DIR] [--pdf-size=KB] [--no-pdfs] [--output=FILE]")
+        sys.exit(1)
+
+    options = {"pages_source": args[0]}
+    for arg in args[1:]:
+        if arg.isdigit():
+            options["limit"] = int(arg)
+        elif arg == "--async":
+            options["async_mode"] = True
+        elif arg == "--no-pdfs":
+            options["with_pdfs"] = False
+        elif arg.startswith("--pdfs="):
+            options["pdf_dir"] = arg.split("=", 1)[1]
+        elif arg.startswith("--pdf-size="):
+            options["pdf_size_kb"] = int(arg.split("=", 1)[1])
+        elif arg.startswith("--output="):
+            options["output"] = arg.split("=", 1)[1]
+        else:
+            print(f"❌ Unknown argument: {arg}")
+            sys.exit(1)
+
+    benchmark(**options)
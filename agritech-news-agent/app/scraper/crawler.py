@@ -0,0 +1,294 @@
+import time
+import asyncio
+import aiohttp
+from app.db import ArticleWriter, init_db, record_query_matches
+from app.scraper.known_ids import KnownArticleIds
+from app.scraper.archive import archive_page, page_archive
+from app.metrics import registry, start_metrics_server
+from app.scraper.metrics import PAGE_FETCH_ERRORS, PAGE_FETCH_SECONDS, PAGES_FETCHED, write_run_summary
+from app.scraper.scraper import (
+    PAGE_SIZE,
+    PROGRESS_EVERY,
+    SCRAPER_CONCURRENCY,
+    ARTICLE_BATCH_SIZE,
+    rate_limiter,
+    parse_search_page,
+    print_duration,
+    NEWEST_MAX_PAGES,
+    get_newest_cutoff,
+    get_resume_offset,
+    newest_page_delta,
+    page_done,
+    save_newest_delta,
+    run_details,
+    save_articles,
+    start_pdf_pipeline,
+)
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=120)
+
+
+async def fetch_page(session, url):
+    """Fetch one search page through the shared session, honouring the per-host rate limit."""
+    await rate_limiter.wait_async(url)
+    try:
+        with PAGE_FETCH_SECONDS.time():
+            async with session.get(url) as response:
+                response.raise_for_status()
+                body = await response.read()
+    except Exception:
+        PAGE_FETCH_ERRORS.inc()
+        raise
+    PAGES_FETCHED.inc()
+    if page_archive is not None:
+        await asyncio.to_thread(archive_page, url, body)
+    return body
+
+
+async def crawl(base_url: str, total_articles: int = None, continue_mode: bool = False,
+                newest: bool = False, concurrency: int = SCRAPER_CONCURRENCY,
+                query: str = None, known_ids: KnownArticleIds = None, pdf_pipeline=None, claimed: set = None,
+                summarize: bool = True):
+    """
+    Async counterpart of `scrape()`: same arguments and stopping rules, but search
+    pages are fetched through one shared session with up to `concurrency` requests
+    in flight. Articles are still inserted in page order; PDFs go to the same
+    background pipeline as the sync scraper.
+
+    `crawl_queries()` runs several crawls side by side and passes in what they
+    share: the id cache, the PDF pipeline (closed by the caller) and `claimed`,
+    the ids already taken by any query of the run. A claimed id is skipped but
+    never stops the crawl. With `query`, every article a page returns is
+    recorded as a match for it. With `summarize=False` no metrics summary is
+    written (the registry is process-wide, so the caller writes one for all
+    queries) and the run details are returned instead.
+    """
+    start_time = time.time()
+    print(f"🚜 Starting agritech-news-agent async crawler (concurrency={concurrency})...")
+    init_db()
+    start_metrics_server()
+    metrics_before = registry.snapshot()
+
+    if not newest and (not total_articles or total_articles <= 0):
+        print("❌ total_articles must be a positive integer when newest=False.")
+        return
+
+    # Existing ids are looked up per page instead of preloading the whole table
+    known_ids = known_ids or KnownArticleIds()
+    claimed = set() if claimed is None else claimed
+
+    scraped = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    writer = ArticleWriter(batch_size=ARTICLE_BATCH_SIZE)
+    owns_pipeline = pdf_pipeline is None
+    if owns_pipeline:
+        pdf_pipeline = start_pdf_pipeline()
+
+    async def fetch_bounded(session, url):
+        async with semaphore:
+            return await fetch_page(session, url)
+
+    async def lookup(parsed_articles):
+        article_ids = [parsed["article_id"] for parsed in parsed_articles]
+        if query:
+            await asyncio.to_thread(record_query_matches, query, article_ids)
+        return await asyncio.to_thread(known_ids.known, article_ids)
+
+    async def save(articles, crawl_state=None):
+        # Postgres and a full PDF queue both block: keep them off the event loop
+        inserted_ids = await asyncio.to_thread(save_articles, writer, articles, pdf_pipeline, crawl_state)
+        known_ids.add(inserted_ids)
+        return inserted_ids
+
+    try:
+        async with aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT) as session:
+            if newest:
+                # Page forward one page at a time: most days the delta ends on page 1,
+                # so fetching ahead would only waste requests
+                cutoff = await asyncio.to_thread(get_newest_cutoff, base_url)
+                delta = []
+                seen = set()
+                for page in range(NEWEST_MAX_PAGES):
+                    paged_url = f"{base_url}&size={PAGE_SIZE}&start={page * PAGE_SIZE}"
+                    print(f"\n🔍 Scraping page {page + 1}:\n{paged_url}\n")
+
+                    try:
+                        html = await fetch_bounded(session, paged_url)
+                    except Exception as e:
+                        # Saving part of the delta would leave a gap the next run cannot see
+                        print(f"❌ Failed to fetch newest page {page + 1}: {e}. Nothing saved.")
+                        return
+
+                    result_count, parsed_articles = parse_search_page(html)
+                    if not result_count:
+                        print("⚠️ No articles found on this page.")
+                        break
+
+                    # Whether to page on is decided on this crawl's own view: articles other
+                    # queries of the run stored or claimed are not a sign of the last run's
+                    # position, they are only left out of the delta
+                    existing_ids = await lookup(parsed_articles) - claimed
+                    new_articles, done = newest_page_delta(parsed_articles, existing_ids, seen, cutoff)
+                    taken = [parsed for parsed in new_articles if parsed["article_id"] in claimed]
+                    new_articles = [parsed for parsed in new_articles if parsed["article_id"] not in claimed]
+                    claimed.update(parsed["article_id"] for parsed in new_articles)
+                    for parsed in taken:
+                        print(f"⏭️  Already taken in this run: {parsed['article_id']}")
+                    delta += new_articles
+                    print(f"📄 Page {page + 1}: {len(new_articles)} new article(s)")
+                    if done or result_count < PAGE_SIZE:
+                        break
+                else:
+                    print(f"⚠️ Stopped after NEWEST_MAX_PAGES={NEWEST_MAX_PAGES} pages; older new articles may remain.")
+
+                inserted_ids = await asyncio.to_thread(save_newest_delta, writer, delta, base_url, pdf_pipeline)
+                known_ids.add(inserted_ids)
+                scraped += len(inserted_ids)
+                print(f"📊 Progress: {scraped} article(s) saved")
+
+            else:
+                # Resume from the saved cursor in continue mode
+                start_offset = await asyncio.to_thread(get_resume_offset, base_url) if continue_mode else 0
+                if start_offset:
+                    print(f"↩️  Resuming {base_url} from offset {start_offset}")
+                scraped = start_offset
+                offsets = list(range(start_offset, total_articles, PAGE_SIZE))
+                checkpointing = True
+                stop = False
+
+                # Fetch pages `concurrency` at a time, then process them in order
+                for window_start in range(0, len(offsets), concurrency):
+                    if stop or scraped >= total_articles:
+                        break
+
+                    starts = offsets[window_start:window_start + concurrency]
+                    urls = [f"{base_url}&size={PAGE_SIZE}&start={start}" for start in starts]
+                    for start, paged_url in zip(starts, urls):
+                        print(f"\n🔍 Scraping page {start // PAGE_SIZE + 1}:\n{paged_url}\n")
+
+                    htmls = await asyncio.gather(
+                        *(fetch_bounded(session, url) for url in urls), return_exceptions=True
+                    )
+
+                    for start, html in zip(starts, htmls):
+                        page = start // PAGE_SIZE
+                        if stop or scraped >= total_articles:
+                            break
+                        if isinstance(html, Exception):
+                            print(f"❌ Failed to fetch page {page + 1}: {html}")
+                            # Never move the cursor past a page that was not processed
+                            checkpointing = False
+                            continue
+
+                        result_count, parsed_articles = parse_search_page(html)
+                        if not result_count:
+                            print("⚠️ No articles found on this page.")
+                            stop = True
+                            break
+
+                        existing_ids = await lookup(parsed_articles)
+                        new_articles = []
+                        complete = True
+                        for parsed in parsed_articles:
+                            if scraped + len(new_articles) >= total_articles:
+                                complete = False
+                                break
+
+                            article_id = parsed["article_id"]
+                            if article_id in claimed:
+                                print(f"⏭️  Already taken in this run: {article_id}")
+                                scraped += 1
+                                continue
+                            if article_id in existing_ids:
+                                if continue_mode:
+                                    print(f"⏭️  Skipping existing article_id: {article_id}")
+                                    scraped += 1
+                                    continue
+                                else:
+                                    print(f"🛑 Found already scraped article_id: {article_id}. Stopping.")
+                                    stop = True
+                                    complete = False
+                                    break
+
+                            new_articles.append(parsed)
+                            existing_ids.add(article_id)
+                            claimed.add(article_id)
+
+                        checkpointing = checkpointing and complete
+                        await save(new_articles, page_done(base_url, start) if checkpointing else None)
+                        scraped += len(new_articles)
+
+                        if new_articles and scraped % PROGRESS_EVERY == 0:
+                            print(f"📊 Progress: {scraped}/{total_articles} articles saved")
+    finally:
+        await asyncio.to_thread(writer.flush)
+        if pdf_pipeline and owns_pipeline:
+            await asyncio.to_thread(pdf_pipeline.close)
+        details = run_details("async", base_url, newest, continue_mode, scraped)
+        summary = write_run_summary(details, metrics_before, time.time() - start_time) if summarize else details
+
+    print(f"\n✅ Done. Scraped and saved {scraped} article(s).")
+    print(f"🗃️ Database: {writer.inserted} inserted, {writer.skipped} skipped, {writer.failed} failed")
+    print_duration(time.time() - start_time)
+    return summary
+
+
+async def crawl_queries(query_urls: dict, total_articles: int = None, continue_mode: bool = False,
+                        newest: bool = False, concurrency: int = SCRAPER_CONCURRENCY):
+    """
+    Crawl several searches ({query: search URL}) at the same time.
+
+    All requests go through the one per-host rate limiter, so adding queries
+    does not raise the load on arXiv. An article returned by several queries is
+    inserted, and its PDF downloaded, only once; every query that returned it
+    is recorded in `article_queries`. `total_articles` applies to each query.
+    The metrics registry is shared by the queries, so one summary covering
+    them all is written, with each query's own details under "queries".
+    """
+    start_time = time.time()
+    print(f"🧭 Crawling {len(query_urls)} queries concurrently: {', '.join(query_urls)}")
+    init_db()
+    start_metrics_server()
+    metrics_before = registry.snapshot()
+
+    known_ids = KnownArticleIds()
+    claimed = set()
+    pdf_pipeline = start_pdf_pipeline()
+    try:
+        results = await asyncio.gather(
+            *(
+                crawl(url, total_articles, continue_mode, newest, concurrency,
+                      query=query, known_ids=known_ids, pdf_pipeline=pdf_pipeline, claimed=claimed,
+                      summarize=False)
+                for query, url in query_urls.items()
+            ),
+            return_exceptions=True,
+        )
+    finally:
+        if pdf_pipeline:
+            await asyncio.to_thread(pdf_pipeline.close)
+
+    queries = {}
+    for query, result in zip(query_urls, results):
+        if isinstance(result, Exception):
+            print(f"❌ Query '{query}' failed: {result}")
+            result = {"query_url": query_urls[query], "error": str(result)}
+        queries[query] = result
+    run = {
+        "mode": "async-multi",
+        "newest": newest,
+        "continue_mode": continue_mode,
+        "articles_scraped": len(claimed),
+        "queries": queries,
+    }
+    summary = write_run_summary(run, metrics_before, time.time() - start_time)
+    print(f"\n🧭 Multi-query crawl done: {len(claimed)} new article(s) across {len(query_urls)} queries.")
+    print_duration(time.time() - start_time)
+    return summary
+
+
+def scrape_async(base_url: str, total_articles: int = None, continue_mode: bool = False,
+                 newest: bool = False, concurrency: int = SCRAPER_CONCURRENCY):
+    """Blocking entry point for `crawl()`, with the same signature as `scrape()`."""
+    return asyncio.run(crawl(base_url, total_articles, continue_mode, newest, concurrency))
@@ -0,0 +1,264 @@
+import os
+import json
+import time
+import hashlib
+import requests
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from app.db import ArticleWriter, init_db
+from app.scraper.rate_limiter import parse_retry_after
+from app.scraper.scraper import (
+    BASE_URL,
+    ARTICLE_BATCH_SIZE,
+    rate_limiter,
+    print_duration,
+    save_articles,
+    start_pdf_pipeline,
+)
+
+OAI_URL = os.getenv("ARXIV_OAI_URL", "https://oaipmh.arxiv.org/oai")
+OAI_METADATA_PREFIX = "arXiv"
+# One checkpoint per harvest: the parameters hash is added to the name (harvest_checkpoint-<hash>.json)
+HARVEST_CHECKPOINT = os.getenv("HARVEST_CHECKPOINT", "logs/harvest_checkpoint.json")
+HARVEST_MAX_RETRIES = 5
+HARVEST_RETRY_AFTER = 10  # Seconds to wait on a 503 without a usable Retry-After
+
+NS = {
+    "oai": "http://www.openarchives.org/OAI/2.0/",
+    "arxiv": "http://arxiv.org/OAI/arXiv/",
+}
+
+
+def _clean(text):
+    """Collapse the line breaks and indentation OAI puts inside titles and abstracts."""
+    return " ".join((text or "").split())
+
+
+def _format_dates(created):
+    """
+    Render an OAI `created` date (YYYY-MM-DD) the way the HTML search page shows it:
+    submission_date "2 January, 2024" and originally_announced "January 2024".
+    """
+    try:
+        date = datetime.strptime(created, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return "", ""
+    return f"{date.day} {date:%B}, {date.year}", f"{date:%B} {date.year}"
+
+
+def parse_record(record):
+    """Map one OAI `<record>` in arXiv format to the dict produced by `parse_article`."""
+    header = record.find("oai:header", NS)
+    if header is not None and header.get("status") == "deleted":
+        return None
+
+    meta = record.find("oai:metadata/arxiv:arXiv", NS)
+    if meta is None:
+        return None
+
+    arxiv_id = _clean(meta.findtext("arxiv:id", namespaces=NS))
+    if not arxiv_id:
+        return None
+
+    authors = []
+    for author in meta.findall("arxiv:authors/arxiv:author", NS):
+        name = " ".join(
+            part for part in (
+                _clean(author.findtext("arxiv:forenames", namespaces=NS)),
+                _clean(author.findtext("arxiv:keyname", namespaces=NS)),
+                _clean(author.findtext("arxiv:suffix", namespaces=NS)),
+            ) if part
+        )
+        if name:
+            authors.append(name)
+
+    submission_date, originally_announced = _format_dates(meta.findtext("arxiv:created", namespaces=NS))
+
+    return {
+        "article_id": arxiv_id,
+        "title": _clean(meta.findtext("arxiv:title", namespaces=NS)),
+        "authors": ", ".join(authors),
+        "abstract": _clean(meta.findtext("arxiv:abstract", namespaces=NS)),
+        "submission_date": submission_date,
+        "originally_announced": originally_announced,
+        "pdf_url": f"{BASE_URL}/pdf/{arxiv_id}",
+        "uploaded_file_url": None
+    }
+
+
+def parse_list_records(xml_text):
+    """
+    Parse one ListRecords response.
+    Returns (articles, resumption_token); the token is None on the last page.
+    Raises RuntimeError on an OAI protocol error other than noRecordsMatch.
+    """
+    root = ET.fromstring(xml_text)
+
+    error = root.find("oai:error", NS)
+    if error is not None:
+        if error.get("code") == "noRecordsMatch":
+            return [], None
+        raise RuntimeError(f"OAI-PMH error {error.get('code')}: {_clean(error.text)}")
+
+    articles = []
+    for record in root.iterfind("oai:ListRecords/oai:record", NS):
+        parsed = parse_record(record)
+        if parsed is not None:
+            articles.append(parsed)
+
+    token = root.findtext("oai:ListRecords/oai:resumptionToken", namespaces=NS)
+    return articles, (token.strip() or None) if token else None
+
+
+def fetch_oai(params):
+    """GET one OAI-PMH page, honouring the shared rate limit and 503 Retry-After."""
+    for attempt in range(HARVEST_MAX_RETRIES):
+        rate_limiter.wait(OAI_URL)
+        response = requests.get(OAI_URL, params=params, timeout=(10, 300))
+        if response.status_code == 503 and attempt < HARVEST_MAX_RETRIES - 1:
+            delay = parse_retry_after(response.headers.get("Retry-After"), HARVEST_RETRY_AFTER)
+            print(f"⏳ OAI-PMH asked us to wait {delay:.0f}s (attempt {attempt + 1}/{HARVEST_MAX_RETRIES})")
+            time.sleep(delay)
+            continue
+        response.raise_for_status()
+        return response.text
+    raise RuntimeError("OAI-PMH endpoint kept returning 503")
+
+
+def checkpoint_file(path, harvest_params):
+    """`path` with a hash of the harvest parameters added, e.g. logs/harvest_checkpoint-1a2b3c4d5e6f.json."""
+    if not path:
+        return None
+    key = hashlib.sha1(json.dumps(harvest_params, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+    base, ext = os.path.splitext(path)
+    return f"{base}-{key}{ext or '.json'}"
+
+
+def load_checkpoint(path, harvest_params=None):
+    """The saved checkpoint, or None when there is none or it belongs to another harvest."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if harvest_params is not None and checkpoint.get("harvest") != harvest_params:
+        print(f"⚠️ Ignoring {path}: it was saved by a harvest with other parameters ({checkpoint.get('harvest')})")
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)  # Atomic: a crash never leaves a half-written checkpoint
+
+
+def clear_checkpoint(path):
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def matches_query(article, keywords):
+    if not keywords:
+        return True
+    haystack = f"{article['title']} {article['abstract']}".lower()
+    return any(keyword in haystack for keyword in keywords)
+
+
+def harvest(query: str = "agriculture", set_spec: str = None, from_date: str = None,
+            until_date: str = None, limit: int = None, checkpoint_path: str = HARVEST_CHECKPOINT,
+            fetch=fetch_oai):
+    """
+    Bulk-harvest arXiv metadata over OAI-PMH (ListRecords, arXiv format).
+
+    OAI-PMH has no keyword search, so records are narrowed server-side by
+    `set_spec` (e.g. "cs", "q-bio") and `from_date` / `until_date`, and then
+    filtered locally on `query` (comma-separated keywords, matched in title or
+    abstract). The next request is checkpointed after every page, in a file
+    keyed by these parameters, so an interrupted harvest with the same
+    parameters resumes where it stopped. `fetch(params) -> xml` can be
+    swapped for a function that replays recorded responses to run offline.
+    """
+    start_time = time.time()
+    print(f"🌾 Starting arXiv OAI-PMH harvest (set={set_spec or 'all'}, query={query or '*'})...")
+    init_db()
+
+    keywords = [k.strip().lower() for k in (query or "").split(",") if k.strip()]
+    harvest_params = {"query": query, "set": set_spec, "from": from_date, "until": until_date}
+    checkpoint_path = checkpoint_file(checkpoint_path, harvest_params)
+    checkpoint = load_checkpoint(checkpoint_path, harvest_params)
+    if checkpoint and checkpoint.get("request"):
+        print(f"↩️  Resuming from {checkpoint_path} ({checkpoint['records_seen']} records already seen)")
+        params = checkpoint["request"]
+        skip = checkpoint.get("skip", 0)
+    else:
+        checkpoint = {"harvest": harvest_params, "records_seen": 0, "matched": 0}
+        params = {"verb": "ListRecords", "metadataPrefix": OAI_METADATA_PREFIX}
+        if set_spec:
+            params["set"] = set_spec
+        if from_date:
+            params["from"] = from_date
+        if until_date:
+            params["until"] = until_date
+        skip = 0
+
+    writer = ArticleWriter(batch_size=ARTICLE_BATCH_SIZE)
+    pdf_pipeline = start_pdf_pipeline()
+    matched = 0
+    page = 0
+
+    try:
+        while True:
+            page += 1
+            print(f"\n📥 Harvesting page {page}...")
+            articles, token = parse_list_records(fetch(params))
+
+            # `skip` matches of this page were saved before the last run hit its limit
+            selected = [article for article in articles if matches_query(article, keywords)][skip:]
+            truncated = limit is not None and len(selected) > limit - matched
+            if truncated:
+                selected = selected[:limit - matched]
+            failed = writer.failed
+            save_articles(writer, selected, pdf_pipeline)
+            if writer.failed > failed:
+                # ArticleWriter logs and counts a failed insert; moving the checkpoint past this page would lose it
+                raise RuntimeError(f"Saving the articles of page {page} failed; "
+                                   f"the checkpoint still points at it, re-run to retry")
+            matched += len(selected)
+
+            checkpoint["matched"] += len(selected)
+            if truncated:
+                # Fetch this page again on resume (the first page has no token: its
+                # request is saved as is) and skip what was already saved
+                checkpoint["request"] = params
+                checkpoint["skip"] = skip + len(selected)
+            else:
+                checkpoint["records_seen"] += len(articles)
+                checkpoint["request"] = {"verb": "ListRecords", "resumptionToken": token} if token else None
+                checkpoint["skip"] = 0
+            checkpoint["updated_at"] = datetime.now().isoformat()
+            save_checkpoint(checkpoint_path, checkpoint)
+            print(f"📊 Page {page}: {len(articles)} records, {len(selected)} matched ({matched} this run)")
+
+            if not checkpoint["request"]:
+                clear_checkpoint(checkpoint_path)
+            if not token:
+                print("🏁 Reached the end of the record list.")
+                break
+            if limit is not None and matched >= limit:
+                print(f"🛑 Reached limit of {limit} articles. Resume later with the saved checkpoint.")
+                break
+            params = {"verb": "ListRecords", "resumptionToken": token}
+            skip = 0
+    finally:
+        writer.flush()
+        if pdf_pipeline:
+            pdf_pipeline.close()
+
+    print(f"\n✅ Done. Harvested {matched} matching article(s).")
+    print(f"🗃️ Database: {writer.inserted} inserted, {writer.skipped} skipped, {writer.failed} failed")
+    print_duration(time.time() - start_time)
+    return {"pages": page, "matched": matched, "checkpoint": checkpoint_path}
@@ -0,0 +1,60 @@
+import os
+import threading
+from collections import OrderedDict
+from app.db import get_existing_article_ids
+
+KNOWN_IDS_CACHE_SIZE = int(os.getenv("KNOWN_IDS_CACHE_SIZE", 100_000))
+
+
+class KnownArticleIds:
+    """
+    "Already scraped?" checks without preloading every article_id.
+
+    Each page asks Postgres about its own ids in one `article_id = ANY(...)`
+    query. Ids known to exist are remembered in a bounded LRU, so re-checks
+    (continue mode, overlapping queries) skip the database, and memory stays
+    capped at `cache_size` ids however large the table grows. Only positive
+    answers are cached: an unknown id can be inserted at any time.
+    """
+
+    def __init__(self, cache_size: int = KNOWN_IDS_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.lookups = 0
+
+    def _remember(self, article_ids):
+        for article_id in article_ids:
+            self._cache[article_id] = True
+            self._cache.move_to_end(article_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def known(self, article_ids) -> set:
+        """Return which of `article_ids` are already stored."""
+        article_ids = list(dict.fromkeys(article_ids))
+        with self._lock:
+            cached = {article_id for article_id in article_ids if article_id in self._cache}
+            for article_id in cached:
+                self._cache.move_to_end(article_id)
+            self.hits += len(cached)
+            self.lookups += len(article_ids)
+
+        misses = [article_id for article_id in article_ids if article_id not in cached]
+        found = get_existing_article_ids(misses) if misses else set()
+
+        with self._lock:
+            self._remember(found)
+        return cached | found
+
+    def add(self, article_ids):
+        """Record ids that were just written, so later pages skip them without a query."""
+        with self._lock:
+            self._remember(article_ids)
+
+    def __contains__(self, article_id):
+        return article_id in self.known([article_id])
+
+    def __len__(self):
+        return len(self._cache)
@@ -1,23 +1,68 @@
 from app.scraper.scraper import scrape
+from urllib.parse import quote_plus
 import sys
 
-def scrape_all_articles(limit, continue_mode):
+def build_search_url(query="agriculture", newest=False):
+    """arXiv search URL for `query`, oldest first (or newest first with `newest`)."""
+    order = "-submitted_date" if newest else "submitted_date"
+    return f"https://arxiv.org/search/?searchtype=all&query={quote_plus(query)}&abstracts=show&order={order}"
+
+def _scrape_fn(async_mode):
+    if async_mode:
+        from app.scraper.crawler import scrape_async
+        return scrape_async
+    return scrape
+
+def scrape_all_articles(limit, continue_mode, async_mode=False):
     """
     Scrape all articles from oldest to newest.
     Used for initial bulk ingestion.
+    'async_mode' uses the concurrent crawler (app.scraper.crawler) instead of the sequential scraper.
     """
-    url = "https://arxiv.org/search/?searchtype=all&query=agriculture&abstracts=show&order=submitted_date"
-    scrape(url, total_articles=limit, continue_mode=continue_mode, newest=False)
+    url = build_search_url("agriculture")
+    _scrape_fn(async_mode)(url, total_articles=limit, continue_mode=continue_mode, newest=False)
 
-def scrape_newest_articles(limit, continue_mode):
+def scrape_newest_articles(limit, continue_mode, async_mode=False):
     """
     Scrape newest articles from newest to oldest.
     Used for daily updates.
     'continue_mode' is optional and disabled by default.
-    To preserve order in DB, reverse insert within page.
+    Pages forward until it reaches articles saved by earlier runs, then inserts
+    the whole delta oldest first to preserve order in DB.
+    """
+    url = build_search_url("agriculture", newest=True)
+    _scrape_fn(async_mode)(url, total_articles=limit, continue_mode=continue_mode, newest=True)
+
+def scrape_queries(queries, limit, continue_mode, newest=False):
+    """
+    Crawl several topics at once under the shared rate limit (async crawler).
+    Articles returned by more than one query are stored once, and each query
+    that returned them is recorded in `article_queries`.
+    """
+    import asyncio
+    from app.scraper.crawler import crawl_queries
+    query_urls = {query: build_search_url(query, newest=newest) for query in queries}
+    return asyncio.run(crawl_queries(query_urls, total_articles=limit, continue_mode=continue_mode, newest=newest))
+
+def harvest_all_articles(limit, set_spec=None, from_date=None):
+    """
+    Bulk-harvest agriculture articles over arXiv's OAI-PMH interface.
+    Faster and sturdier than paging the HTML search for backfills;
+    resumes from the last checkpointed resumption token.
+    """
+    from app.scraper.harvester import harvest
+    harvest(query="agriculture", set_spec=set_spec, from_date=from_date, limit=limit)
+
+def refresh_uploaded_pdfs(limit=None):
+    """
+    Re-check uploaded PDFs with conditional requests (periodic job).
+    Only PDFs that really changed are transferred again and flagged for re-indexing.
     """
-    url = "https://arxiv.org/search/?searchtype=all&query=agriculture&abstracts=show&order=-submitted_date"
-    scrape(url, total_articles=limit, continue_mode=continue_mode, newest=True)
+    from app.db import init_db
+    from app.scraper.pdf_pipeline import refresh_pdfs
+    from app.scraper.scraper import rate_limiter
+    init_db()
+    return refresh_pdfs(limit=limit, rate_limiter=rate_limiter)
 
 if __name__ == "__main__":
     args = sys.argv[1:]
@@ -26,6 +71,13 @@ if __name__ == "__main__":
     max_articles = 25
     continue_mode = False
     get_newest_mode = False
+    async_mode = False
+    harvest_mode = False
+    set_spec = None
+    from_date = None
+    queries = None
+    backfill_dates = False
+    refresh_mode = False
 
     # Parse CLI args
     for arg in args:
@@ -35,13 +87,41 @@ if __name__ == "__main__":
             continue_mode = True
         elif arg == "--newest":
             get_newest_mode = True
+        elif arg == "--async":
+            async_mode = True
+        elif arg == "--harvest":
+            harvest_mode = True
+        elif arg.startswith("--set="):
+            set_spec = arg.split("=", 1)[1]
+        elif arg.startswith("--from="):
+            from_date = arg.split("=", 1)[1]
+        elif arg == "--backfill-dates":
+            backfill_dates = True
+        elif arg == "--refresh-pdfs":
+            refresh_mode = True
+        elif arg.startswith("--queries="):
+            queries = [q.strip() for q in arg.split("=", 1)[1].split(",") if q.strip()]
         else:
             print(f"❌ Unknown argument: {arg}")
-            print("Usage: python main.py [limit] [--continue] [--newest]")
+            print("Usage: python main.py [limit] [--continue] [--newest] [--async]")
+            print("       python main.py [limit] [--continue] [--newest] --queries=q1,q2,...")
+            print("       python main.py --backfill-dates")
+            print("       python main.py [limit] --refresh-pdfs")
+            print("       python main.py [limit] --harvest [--set=SET] [--from=YYYY-MM-DD]")
             sys.exit(1)
 
     # Run the appropriate scrape method
-    if get_newest_mode:
-        scrape_newest_articles(max_articles, continue_mode)
+    if backfill_dates:
+        from app.db import init_db, backfill_article_dates
+        init_db()
+        print(f"✅ Backfilled dates on {backfill_article_dates()} article(s).")
+    elif refresh_mode:
+        refresh_uploaded_pdfs(max_articles if any(a.isdigit() for a in args) else None)
+    elif harvest_mode:
+        harvest_all_articles(max_articles if any(a.isdigit() for a in args) else None, set_spec, from_date)
+    elif queries:
+        scrape_queries(queries, max_articles, continue_mode, get_newest_mode)
+    elif get_newest_mode:
+        scrape_newest_articles(max_articles, continue_mode, async_mode)
     else:
-        scrape_all_articles(max_articles, continue_mode)
+        scrape_all_articles(max_articles, continue_mode, async_mode)
@@ -0,0 +1,52 @@
+import os
+import json
+from datetime import datetime
+
+from app.metrics import registry
+
+METRICS_DIR = os.getenv("METRICS_DIR", "logs/metrics")
+
+PAGES_FETCHED = registry.counter("scraper_pages_fetched_total", "Search pages fetched successfully")
+PAGE_FETCH_ERRORS = registry.counter("scraper_page_fetch_errors_total", "Search page fetches that failed")
+PAGE_FETCH_SECONDS = registry.histogram("scraper_page_fetch_seconds", "Search page fetch latency, excluding rate-limit waits")
+PAGE_PARSE_SECONDS = registry.histogram("scraper_page_parse_seconds", "Time to parse one search page")
+DB_WRITE_SECONDS = registry.histogram("scraper_db_write_seconds", "Time to write one page of articles to Postgres")
+ARTICLES_INSERTED = registry.counter("scraper_articles_inserted_total", "Articles inserted into Postgres")
+PDF_BYTES = registry.counter("scraper_pdf_bytes_total", "PDF bytes downloaded from arXiv")
+PDF_DOWNLOAD_SECONDS = registry.histogram(
+    "scraper_pdf_download_seconds", "Time to download one PDF from arXiv, retries included"
+)
+PDF_UPLOAD_SECONDS = registry.histogram("scraper_pdf_upload_seconds", "Time to upload one PDF to Spaces")
+PDF_UPLOADS = registry.counter("scraper_pdf_uploads_total", "PDFs uploaded to Spaces")
+PDF_FAILURES = registry.counter("scraper_pdf_failures_total", "PDF downloads or uploads that failed")
+ARTICLES_PER_SECOND = registry.gauge("scraper_articles_per_second", "Articles inserted per second in the last run")
+
+
+def write_run_summary(run: dict, before: dict, elapsed: float, metrics_dir: str = METRICS_DIR):
+    """
+    Write the per-run metrics next to the run details (`run`) as
+    <metrics_dir>/scrape_<timestamp>.json (one file per run), so runs can be compared over time.
+    Inside `registry.run()` the metrics are the run's own ("metrics_scope": "run"); otherwise
+    they are the process-wide difference from `before` ("metrics_scope": "process").
+    Returns the summary dict.
+    """
+    summary = registry.summarize(before)
+    inserted = summary["scraper_articles_inserted_total"]
+    articles_per_second = inserted / elapsed if elapsed else 0.0
+    ARTICLES_PER_SECOND.set(articles_per_second)
+    summary["scraper_articles_per_second"] = round(articles_per_second, 3)
+
+    result = {
+        **run,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_seconds": round(elapsed, 3),
+        "metrics_scope": "run" if registry.in_run() else "process",
+        "metrics": summary,
+    }
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        path = os.path.join(metrics_dir, f"scrape_{datetime.now():%Y%m%d-%H%M%S-%f}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"📈 Run metrics written to {path}")
+    return result
@@ -0,0 +1,317 @@
+import os
+import re
+import time
+import queue
+import hashlib
+import threading
+import contextvars
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+import requests
+import urllib3
+from app.db import get_pdfs_to_refresh, mark_pdf_checked, update_uploaded_file_url
+from app.scraper.rate_limiter import parse_retry_after
+from app.scraper.metrics import PDF_BYTES, PDF_DOWNLOAD_SECONDS, PDF_FAILURES, PDF_UPLOAD_SECONDS, PDF_UPLOADS
+from app.scraper.uploader import StreamingUpload, get_object_key, get_object_url, object_exists
+
+PDF_REQUEST_TIMEOUT = (10, 120)  # (connect, read) seconds
+PDF_CHUNK_SIZE = 256 * 1024
+PDF_MAX_RETRIES = int(os.getenv("PDF_MAX_RETRIES", 3))  # Extra attempts after a failed or interrupted download
+PDF_RETRY_BACKOFF = float(os.getenv("PDF_RETRY_BACKOFF", 2.0))  # Seconds before the first retry, doubled each time
+PDF_REFRESH_MAX_AGE_DAYS = float(os.getenv("PDF_REFRESH_MAX_AGE_DAYS", 7))  # Re-check PDFs not checked for this long
+MAX_RETRY_AFTER = 300
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_STOP = object()
+_VERSION_RE = re.compile(r"v(\d+)(?:\.pdf)?$")
+_FILENAME_RE = re.compile(r'filename="?([^";]+)')
+
+
+class PdfDownloadError(Exception):
+    pass
+
+
+class _RetryableError(Exception):
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def content_object_name(sha256):
+    return f"sha256/{sha256}.pdf"
+
+def arxiv_version(response):
+    """
+    The arXiv version (2 for v2) of the PDF in `response`: read from the URL it
+    was redirected to (/pdf/<id>v2) or from the Content-Disposition filename.
+    """
+    candidates = [urlparse(response.url or "").path.rstrip("/")]
+    match = _FILENAME_RE.search(response.headers.get("Content-Disposition", ""))
+    if match:
+        candidates.append(match.group(1))
+    for candidate in candidates:
+        version = _VERSION_RE.search(candidate)
+        if version:
+            return int(version.group(1))
+    return None
+
+def _restart(spool):
+    """Discard what a download wrote so far: a file is truncated, an upload stream restarted."""
+    if hasattr(spool, "restart"):
+        spool.restart()
+    else:
+        spool.seek(0)
+        spool.truncate()
+
+def _expected_size(response):
+    """Total size of the PDF announced by a 200 (Content-Length) or a 206 (Content-Range)."""
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    elif response.headers.get("Content-Encoding"):
+        return None  # Content-Length counts the encoded bytes
+    else:
+        total = response.headers.get("Content-Length", "")
+    return int(total) if total.isdigit() else None
+
+def download_pdf(pdf_url, spool, etag=None, last_modified=None, rate_limiter=None, http=requests):
+    """
+    Download a PDF into `spool` (a file, or a `StreamingUpload`), hashing it on the way.
+
+    `etag` / `last_modified` (from an earlier download) make the request
+    conditional: None is returned when the server answers 304 Not Modified.
+    Connection errors, timeouts, truncated bodies and 429/5xx answers are
+    retried up to PDF_MAX_RETRIES times with exponential backoff (or the
+    server's Retry-After). An interrupted transfer resumes with a Range request
+    guarded by If-Range, so it never mixes bytes of two versions; a server that
+    ignores the range sends the whole file again and the download restarts.
+
+    Returns {"sha256", "size", "version", "etag", "last_modified"}.
+    Raises PdfDownloadError when the PDF cannot be fetched.
+    """
+    digest = hashlib.sha256()
+    received = 0
+    served = {}  # Validators and version of the copy being downloaded
+
+    for attempt in range(PDF_MAX_RETRIES + 1):
+        if_range = served.get("etag") if not (served.get("etag") or "").startswith("W/") else None
+        if_range = if_range or served.get("last_modified")
+        if received and not if_range:
+            # Without a validator a resumed body could belong to another version
+            _restart(spool)
+            digest, received = hashlib.sha256(), 0
+
+        headers = {}
+        if received:
+            headers.update({"Range": f"bytes={received}-", "If-Range": if_range})
+        else:
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        if rate_limiter is not None:
+            rate_limiter.wait(pdf_url)
+        try:
+            with http.get(pdf_url, headers=headers, stream=True, timeout=PDF_REQUEST_TIMEOUT) as response:
+                status = response.status_code
+                if status == 304 and not received:
+                    return None
+                if status in RETRY_STATUSES:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise _RetryableError(f"HTTP {status}",
+                                          None if retry_after is None else min(retry_after, MAX_RETRY_AFTER))
+                resumed = status == 206 and received and \
+                    response.headers.get("Content-Range", "").startswith(f"bytes {received}-")
+                if status != 200 and not resumed:
+                    raise PdfDownloadError(f"HTTP {status}")
+                if status == 200:
+                    if received:
+                        print(f"🔁 Server sent the whole PDF again, restarting {pdf_url}")
+                        _restart(spool)
+                        digest, received = hashlib.sha256(), 0
+                    served = {
+                        "version": arxiv_version(response),
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    }
+                    if response.headers.get("Content-Encoding"):
+                        served["etag"] = served["last_modified"] = None  # Byte ranges would not line up
+
+                response.raw.decode_content = True
+                expected = _expected_size(response)
+                for chunk in iter(lambda: response.raw.read(PDF_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    spool.write(chunk)
+                    received += len(chunk)
+                    PDF_BYTES.inc(len(chunk))
+                if expected is not None and received < expected:
+                    raise _RetryableError(f"connection closed after {received} of {expected} bytes")
+            return {"sha256": digest.hexdigest(), "size": received, **served}
+        except (_RetryableError, requests.RequestException, urllib3.exceptions.HTTPError) as e:
+            if attempt == PDF_MAX_RETRIES:
+                raise PdfDownloadError(f"gave up after {attempt + 1} attempts: {e}") from e
+            delay = getattr(e, "retry_after", None) or PDF_RETRY_BACKOFF * 2 ** attempt
+            resume = f" from byte {received}" if received else ""
+            print(f"🔁 PDF download failed ({e}); retrying{resume} in {delay:.1f}s")
+            time.sleep(delay)
+
+def fetch_pdf_to_spaces(arxiv_id, pdf_url, etag=None, last_modified=None, rate_limiter=None,
+                        http=requests, reuse_legacy=True) -> dict:
+    """
+    Download a PDF, hashing it as it streams, and store it under its content
+    hash (`<PDF_FOLDER>/sha256/<hex>.pdf`). The body is streamed straight
+    into Spaces while it downloads (see `StreamingUpload`): no temp file and
+    no full copy in memory. If those bytes are already in the bucket, the
+    uploaded copy is dropped. With `reuse_legacy`, PDFs uploaded earlier under
+    their arXiv id are reused without a download.
+
+    Returns {"url", "sha256", "version", "etag", "last_modified", "not_modified"}:
+    the URL is None on failure, and `not_modified` is True when the conditional
+    request (`etag` / `last_modified`) found the PDF unchanged.
+    """
+    result = {"url": None, "sha256": None, "version": None, "etag": None,
+              "last_modified": None, "not_modified": False}
+    safe_arxiv_id = arxiv_id.replace("/", "_")  # Replace '/' with '_'
+    legacy_key = get_object_key(f"{safe_arxiv_id}.pdf")
+    upload = None
+
+    try:
+        if reuse_legacy and object_exists(legacy_key):
+            result["url"] = get_object_url(legacy_key)
+            print(f"⚠️ File already exists in bucket. Skipping download: {result['url']}")
+            return result
+
+        upload = StreamingUpload()
+        start = time.perf_counter()
+        download = download_pdf(pdf_url, upload, etag, last_modified, rate_limiter, http)
+        # Parts are uploaded while the PDF downloads: each histogram gets its own share
+        PDF_DOWNLOAD_SECONDS.observe(time.perf_counter() - start - upload.upload_seconds)
+        if download is None:
+            result["not_modified"] = True
+            return result
+        result.update({key: download[key] for key in ("sha256", "version", "etag", "last_modified")})
+
+        result["url"], uploaded = upload.save_as(content_object_name(download["sha256"]))
+        if uploaded:
+            PDF_UPLOAD_SECONDS.observe(upload.upload_seconds)
+        else:
+            print(f"⚠️ Identical PDF already in bucket. Skipping upload: {result['url']}")
+        return result
+    except Exception as e:
+        print(f"❌ Error downloading/uploading PDF for {arxiv_id}: {e}")
+        return result
+    finally:
+        if upload is not None:
+            upload.abort()  # No-op once the body is saved
+
+def refresh_pdfs(limit: int = None, max_age_days: float = PDF_REFRESH_MAX_AGE_DAYS, rate_limiter=None, http=requests):
+    """
+    Re-check uploaded PDFs not checked for `max_age_days` with conditional
+    requests. Unchanged PDFs (304) cost no transfer; a PDF whose bytes changed
+    (e.g. a new arXiv version) is uploaded under its new hash and its article
+    is flagged for re-indexing. Returns the counts per outcome.
+    """
+    checked_before = datetime.now() - timedelta(days=max_age_days) if max_age_days else None
+    articles = get_pdfs_to_refresh(checked_before, limit)
+    print(f"🔄 Checking {len(articles)} uploaded PDF(s) for new versions...")
+
+    stats = {"unchanged": 0, "changed": 0, "failed": 0}
+    for article in articles:
+        article_id = article["article_id"]
+        result = fetch_pdf_to_spaces(
+            article_id, article["pdf_url"], article["pdf_etag"], article["pdf_last_modified"],
+            rate_limiter=rate_limiter, http=http, reuse_legacy=False,
+        )
+        if result["not_modified"]:
+            mark_pdf_checked(article_id)
+            stats["unchanged"] += 1
+            continue
+        if not result["url"]:
+            stats["failed"] += 1
+            continue
+
+        update_uploaded_file_url(article_id, result["url"], result["sha256"], result["version"],
+                                 result["etag"], result["last_modified"])
+        if article["pdf_sha256"] and article["pdf_sha256"] != result["sha256"]:
+            stats["changed"] += 1
+            version = f"v{result['version']}" if result["version"] else "new content"
+            print(f"🆕 {article_id}: {version}, flagged for re-indexing")
+        else:
+            stats["unchanged"] += 1
+
+    print(
+        f"🔄 PDF refresh: {stats['changed']} changed, {stats['unchanged']} unchanged, "
+        f"{stats['failed']} failed"
+    )
+    return stats
+
+
+class PdfPipeline:
+    """
+    Download/upload stage decoupled from metadata scraping.
+
+    The scraper inserts an article and then calls `submit()`; one of `workers`
+    threads streams the PDF into Spaces and fills in `uploaded_file_url` and
+    `pdf_sha256` once the upload is done. The queue is bounded, so a slow upload side applies
+    backpressure to the scraper instead of growing without limit.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 100, rate_limiter=None):
+        self.rate_limiter = rate_limiter
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.stats = {"submitted": 0, "uploaded": 0, "failed": 0}
+        # Workers run in a copy of the creator's context, so context variables
+        # (e.g. the scraper API's current job, which routes its output) follow the PDFs
+        self._threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(self._worker,),
+                             name=f"pdf-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, article_id, pdf_url):
+        self._queue.put((article_id, pdf_url))
+        with self._lock:
+            self.stats["submitted"] += 1
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is _STOP:
+                    return
+                article_id, pdf_url = item
+                print(f"📄 Downloading and uploading PDF for {article_id}...")
+                result = fetch_pdf_to_spaces(article_id, pdf_url, rate_limiter=self.rate_limiter)
+                uploaded_url = result["url"]
+                if uploaded_url:
+                    update_uploaded_file_url(article_id, uploaded_url, result["sha256"], result["version"],
+                                             result["etag"], result["last_modified"])
+                    print(f"✅ Uploaded PDF for {article_id}")
+                else:
+                    print(f"❌ Failed to upload PDF for {article_id}")
+                with self._lock:
+                    self.stats["uploaded" if uploaded_url else "failed"] += 1
+                (PDF_UPLOADS if uploaded_url else PDF_FAILURES).inc()
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """Wait for every queued PDF to be processed, then stop the workers."""
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        print(
+            f"📄 PDF pipeline: {self.stats['uploaded']} uploaded, "
+            f"{self.stats['failed']} failed out of {self.stats['submitted']}"
+        )
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Rebuild `articles` rows from the raw page archive
+Re-runs the current parser (parse_search_page) over every archived search page
+and upserts the parsed fields, without fetching anything from arXiv.
+Columns filled later (uploaded_file_url, pdf_sha256) are kept.
+
+Usage:
+    python app/scraper/reparse.py <archive file or dir> [--dry-run]
+"""
+
+import sys
+import time
+from app.db import init_db, upsert_articles
+from app.scraper.archive import iter_archive
+from app.scraper.scraper import ARTICLE_BATCH_SIZE, parse_search_page, print_duration
+
+
+def reparse(path, dry_run=False, batch_size=ARTICLE_BATCH_SIZE):
+    start_time = time.time()
+    print(f"♻️ Re-parsing archived pages from {path}{' (dry run)' if dry_run else ''}...")
+    if not dry_run:
+        init_db()
+
+    pages = parsed = written = 0
+    batch = []
+    for record in iter_archive(path):
+        pages += 1
+        articles = parse_search_page(record["html"])[1]
+        parsed += len(articles)
+        batch += articles
+        if len(batch) >= batch_size:
+            written += 0 if dry_run else upsert_articles(batch)
+            batch = []
+    if batch and not dry_run:
+        written += upsert_articles(batch)
+
+    elapsed = time.time() - start_time
+    print(f"\n✅ Re-parsed {pages} page(s): {parsed} article(s), {written} row(s) written")
+    if elapsed:
+        print(f"⚡ {pages / elapsed:,.1f} pages/sec, {parsed / elapsed:,.0f} articles/sec")
+    print_duration(elapsed)
+    return {"pages": pages, "articles": parsed, "written": written}
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    paths = [arg for arg in args if not arg.startswith("--")]
+    if len(paths) != 1 or any(arg.startswith("--") and arg != "--dry-run" for arg in args):
+        print("Usage: python app/scraper/reparse.py <archive file or dir> [--dry-run]")
+        sys.exit(1)
+    reparse(paths[0], dry_run="--dry-run" in args)
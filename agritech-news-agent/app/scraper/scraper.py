@@ -1,21 +1,50 @@
 import os
 import time
-import math
-import random
 import requests
-from bs4 import BeautifulSoup, NavigableString
-from app.db import insert_article, init_db, get_all_article_ids
-from app.scraper.uploader import upload_pdf_to_spaces
+from bs4 import NavigableString
+from lxml import etree, html as lxml_html
+from app.db import ArticleWriter, init_db, get_crawl_state, parse_announced_date
+from app.scraper.pdf_pipeline import PdfPipeline
+from app.scraper.uploader import manifest
+from app.scraper.rate_limiter import HostRateLimiter
+from app.scraper.known_ids import KnownArticleIds
+from app.scraper.archive import archive_page
+from app.metrics import registry, start_metrics_server
+from app.scraper.metrics import (
+    ARTICLES_INSERTED,
+    DB_WRITE_SECONDS,
+    PAGE_FETCH_ERRORS,
+    PAGE_FETCH_SECONDS,
+    PAGE_PARSE_SECONDS,
+    PAGES_FETCHED,
+    write_run_summary,
+)
 from dotenv import load_dotenv
 
 load_dotenv()
 
-BASE_URL = "https://arxiv.org"
+BASE_URL = os.getenv("ARXIV_BASE_URL", "https://arxiv.org")  # Where PDF links point; the offline benchmark overrides it
 PAGE_SIZE = 25
 PROGRESS_EVERY = 1
-TEMP_PDF_DIR = "/tmp"
 S3_UPLOAD = os.getenv("S3_UPLOAD") == "true"
 
+# Politeness settings shared by the sync scraper and the async crawler
+SCRAPER_RATE = float(os.getenv("SCRAPER_RATE", 0.5))  # requests per second, per host
+SCRAPER_BURST = float(os.getenv("SCRAPER_BURST", 1))
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", 4))
+
+# Background PDF download/upload stage (only used when S3_UPLOAD=true)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 4))
+PDF_QUEUE_SIZE = int(os.getenv("PDF_QUEUE_SIZE", 100))
+
+# Articles written to Postgres per round-trip
+ARTICLE_BATCH_SIZE = int(os.getenv("ARTICLE_BATCH_SIZE", 100))
+
+# Newest mode pages forward until it meets known articles, but never past this many pages
+NEWEST_MAX_PAGES = int(os.getenv("NEWEST_MAX_PAGES", 20))
+
+rate_limiter = HostRateLimiter(SCRAPER_RATE, SCRAPER_BURST)
+
 def print_duration(seconds):
     if seconds < 60:
         print(f"🕒 Time spent: {seconds:.2f} seconds")
@@ -62,142 +91,299 @@ def parse_article(article):
         print(f"❌ Error parsing article: {e}")
         return None
 
-def download_and_upload_pdf(arxiv_id):
-    pdf_url = f"{BASE_URL}/pdf/{arxiv_id}"
-    safe_arxiv_id = arxiv_id.replace("/", "_")  # Replace '/' with '_'
-    local_path = os.path.join(TEMP_PDF_DIR, f"{safe_arxiv_id}.pdf")
+def _has_class(name):
+    """XPath predicate matching one class token, like BeautifulSoup's class_=name."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_RESULTS = etree.XPath(f"//li[{_has_class('arxiv-result')}]")
+_LIST_TITLE_LINK = etree.XPath(f"(.//p[{_has_class('list-title')}])[1]/descendant::a[1]")
+_TITLE = etree.XPath(f"(.//p[{_has_class('title')}])[1]")
+_AUTHOR_LINKS = etree.XPath(f"(.//p[{_has_class('authors')}])[1]//a")
+_ABSTRACT_FULL = etree.XPath(f"(.//span[{_has_class('abstract-full')}])[1]")
+_DATE_BLOCK = etree.XPath(f"(.//p[{_has_class('is-size-7')}])[1]")
+_ANNOUNCED_LABEL = etree.XPath(".//span[not(*) and . = 'originally announced'][1]")
+
+def _parse_result(node):
+    """lxml twin of `parse_article`: same fields, same text handling."""
+    arxiv_id = _LIST_TITLE_LINK(node)[0].text_content().strip().replace("arXiv:", "")
+    title = _TITLE(node)[0].text_content().strip()
+    authors = ", ".join(a.text_content().strip() for a in _AUTHOR_LINKS(node))
+
+    abstract_block = _ABSTRACT_FULL(node)
+    abstract = abstract_block[0].text_content().strip().replace("△ Less", "") if abstract_block else ""
+
+    # Submission date
+    submission_date = ""
+    date_block = _DATE_BLOCK(node)[0]
+    date_text = date_block.text_content()
+    if "Submitted" in date_text:
+        submission_date = date_text.split("Submitted")[1].split(";")[0].strip()
+
+    # Originally announced
+    originally_announced = ""
+    announced_tag = _ANNOUNCED_LABEL(date_block)
+    if announced_tag and announced_tag[0].tail:
+        originally_announced = announced_tag[0].tail.strip().rstrip(".")
+
+    return {
+        "article_id": arxiv_id,
+        "title": title,
+        "authors": authors,
+        "abstract": abstract,
+        "submission_date": submission_date,
+        "originally_announced": originally_announced,
+        "pdf_url": f"{BASE_URL}/pdf/{arxiv_id}",
+        "uploaded_file_url": None
+    }
+
+def parse_search_page(page_html):
+    """
+    Parse a search results page once with lxml and extract every `li.arxiv-result`.
+    Returns (result_count, parsed_articles); results that fail to parse are skipped.
+    """
+    with PAGE_PARSE_SECONDS.time():
+        if isinstance(page_html, str):
+            # lxml refuses str input that still carries an XML encoding declaration
+            page_html = page_html.encode("utf-8")
+        tree = lxml_html.fromstring(page_html, parser=lxml_html.HTMLParser(encoding="utf-8"))
+        results = _RESULTS(tree)
+
+        parsed_articles = []
+        for node in results:
+            try:
+                parsed_articles.append(_parse_result(node))
+            except Exception as e:
+                print(f"❌ Error parsing article: {e}")
+    return len(results), parsed_articles
+
+def fetch_search_page(paged_url):
+    """GET one search page after waiting for the rate limit. Returns the raw body."""
+    rate_limiter.wait(paged_url)
     try:
-        response = requests.get(pdf_url)
-        if response.status_code == 200:
-            with open(local_path, "wb") as f:
-                f.write(response.content)
-            uploaded_url = upload_pdf_to_spaces(local_path, object_name=f"{safe_arxiv_id}.pdf")
-            os.remove(local_path)
-            return uploaded_url
-        else:
-            print(f"❌ Could not download PDF for {arxiv_id}")
-            return None
+        with PAGE_FETCH_SECONDS.time():
+            response = requests.get(paged_url)
+            response.raise_for_status()
+    except Exception:
+        PAGE_FETCH_ERRORS.inc()
+        raise
+    PAGES_FETCHED.inc()
+    archive_page(paged_url, response.content)
+    return response.content
+
+def start_pdf_pipeline():
+    """Return the background PDF stage when S3 uploads are enabled, else None."""
+    if not S3_UPLOAD:
+        return None
+    # Re-list the bucket once per run, so PDFs uploaded by other processes are seen
+    try:
+        manifest.refresh()
     except Exception as e:
-        print(f"❌ Error downloading/uploading PDF for {arxiv_id}: {e}")
+        print(f"⚠️ Could not list bucket, will retry on first PDF: {e}")
+    return PdfPipeline(workers=PDF_WORKERS, max_queue=PDF_QUEUE_SIZE, rate_limiter=rate_limiter)
+
+def save_articles(writer, articles, pdf_pipeline=None, crawl_state=None) -> list:
+    """
+    Persist a page of articles in one round-trip, then queue the PDFs of the
+    rows that were actually inserted. Returns the inserted article_ids.
+    `crawl_state` marks the page done in the same transaction as the inserts.
+    """
+    inserted_ids = []
+    with DB_WRITE_SECONDS.time():
+        for parsed in articles:
+            inserted_ids += writer.add(parsed)
+        inserted_ids += writer.flush(crawl_state)
+    ARTICLES_INSERTED.inc(len(inserted_ids))
+
+    if pdf_pipeline:
+        inserted = set(inserted_ids)
+        for parsed in articles:
+            if parsed["article_id"] in inserted:
+                pdf_pipeline.submit(parsed["article_id"], parsed["pdf_url"])
+    return inserted_ids
+
+def get_resume_offset(base_url) -> int:
+    """Result offset of the first page not yet completed for this query (0 for a fresh crawl)."""
+    state = get_crawl_state(base_url)
+    if not state:
+        return 0
+    return state["last_offset"] + state["page_size"]
+
+def page_done(base_url, start) -> dict:
+    return {"query_url": base_url, "last_offset": start, "page_size": PAGE_SIZE}
+
+def get_newest_cutoff(base_url):
+    """
+    Month of the last successful newest run on this URL (its `crawl_state` row),
+    or None before the first run. Articles announced in an earlier month were
+    already on arXiv when that run happened.
+    """
+    state = get_crawl_state(base_url)
+    if not state:
         return None
+    return state["updated_at"].date().replace(day=1)
+
+def newest_page_delta(parsed_articles, existing_ids, seen, cutoff) -> tuple:
+    """
+    Pick the not-yet-stored articles from one newest-first page.
+    Returns (new_articles, done): done once the whole page is already known
+    or an article was announced before `cutoff`.
+    """
+    new_articles = []
+    for parsed in parsed_articles:
+        article_id = parsed["article_id"]
+        announced = parse_announced_date(parsed["originally_announced"])
+        if cutoff and announced and announced < cutoff:
+            print(f"🛑 {article_id} was announced before the last run ({parsed['originally_announced']}). Stopping.")
+            return new_articles, True
+        if article_id in existing_ids or article_id in seen:
+            continue
+        seen.add(article_id)
+        new_articles.append(parsed)
+    if not new_articles:
+        print("🛑 Whole page already scraped. Stopping.")
+        return new_articles, True
+    return new_articles, False
+
+def save_newest_delta(writer, delta, base_url, pdf_pipeline=None) -> list:
+    """
+    Insert a newest-mode delta (collected newest first) oldest first, in a
+    single INSERT that also records this run in `crawl_state`.
+    """
+    delta = list(reversed(delta))
+    writer.batch_size = max(writer.batch_size, len(delta) + 1)  # Keep the whole delta in one round-trip
+    return save_articles(writer, delta, pdf_pipeline, page_done(base_url, 0))
+
+def run_details(mode, base_url, newest, continue_mode, scraped) -> dict:
+    """Identifies a run in its metrics summary."""
+    return {
+        "mode": mode,
+        "query_url": base_url,
+        "newest": newest,
+        "continue_mode": continue_mode,
+        "articles_scraped": scraped,
+    }
 
 def scrape(base_url: str, total_articles: int = None, continue_mode: bool = False, newest: bool = False):
     start_time = time.time()
     print(f"🚜 Starting agritech-news-agent scraper...")
     init_db()
+    start_metrics_server()
+    metrics_before = registry.snapshot()
 
     if not newest and (not total_articles or total_articles <= 0):
         print("❌ total_articles must be a positive integer when newest=False.")
         return
 
-    print("📦 Preloading existing article IDs...")
-    existing_ids = get_all_article_ids()
-    print(f"✅ Loaded {len(existing_ids)} existing articles from DB.")
+    # Existing ids are looked up per page instead of preloading the whole table
+    known_ids = KnownArticleIds()
 
     scraped = 0
+    writer = ArticleWriter(batch_size=ARTICLE_BATCH_SIZE)
+    pdf_pipeline = start_pdf_pipeline()
 
-    if newest:
-        # Only fetch the first page
-        paged_url = f"{base_url}&size={PAGE_SIZE}&start=0"
-        print(f"\n🔍 Scraping page 1:\n{paged_url}\n")
-
-        try:
-            response = requests.get(paged_url)
-            response.raise_for_status()
-        except Exception as e:
-            print(f"❌ Failed to fetch newest page: {e}")
-            return
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        results = soup.find_all("li", class_="arxiv-result")
-        if not results:
-            print("⚠️ No articles found on this page.")
-            return
-
-        parsed_articles = [parse_article(article) for article in results if parse_article(article) is not None]
-        parsed_articles.reverse()  # Optional: newest at the end
-
-        for parsed in parsed_articles:
-            article_id = parsed["article_id"]
-            if article_id in existing_ids:
-                print(f"⏭️  Skipping existing article_id: {article_id}")
-                continue
-
-            if S3_UPLOAD:
-                print(f"📄 Downloading and uploading PDF for {article_id}...")
-                uploaded_pdf_url = download_and_upload_pdf(article_id)
-                if uploaded_pdf_url:
-                    parsed["uploaded_file_url"] = uploaded_pdf_url
-                    print(f"✅ Uploaded PDF for {article_id}")
-                else:
-                    print(f"❌ Failed to upload PDF for {article_id}")
-
-            insert_article(parsed)
-            existing_ids.add(article_id)
-            scraped += 1
-            print(f"📊 Progress: {scraped} article(s) saved")
-
-            time.sleep(random.uniform(1.2, 2.5))
-
-    else:
-        # Standard pagination scraping
-        total_pages = math.ceil(total_articles / PAGE_SIZE)
-
-        for page in range(total_pages):
-            if scraped >= total_articles:
-                break
-
-            start = page * PAGE_SIZE
-            paged_url = f"{base_url}&size={PAGE_SIZE}&start={start}"
-            print(f"\n🔍 Scraping page {page + 1}:\n{paged_url}\n")
+    try:
+        if newest:
+            # Page forward from the newest result until we reach what earlier runs saved
+            cutoff = get_newest_cutoff(base_url)
+            delta, seen = [], set()
+            for page in range(NEWEST_MAX_PAGES):
+                paged_url = f"{base_url}&size={PAGE_SIZE}&start={page * PAGE_SIZE}"
+                print(f"\n🔍 Scraping page {page + 1}:\n{paged_url}\n")
+
+                try:
+                    page_html = fetch_search_page(paged_url)
+                except Exception as e:
+                    # Saving part of the delta would leave a gap the next run cannot see
+                    print(f"❌ Failed to fetch newest page {page + 1}: {e}. Nothing saved.")
+                    return
+
+                result_count, parsed_articles = parse_search_page(page_html)
+                if not result_count:
+                    print("⚠️ No articles found on this page.")
+                    break
 
-            try:
-                response = requests.get(paged_url)
-                response.raise_for_status()
-            except Exception as e:
-                print(f"❌ Failed to fetch page {page + 1}: {e}")
-                continue
+                existing_ids = known_ids.known(parsed["article_id"] for parsed in parsed_articles)
+                new_articles, done = newest_page_delta(parsed_articles, existing_ids, seen, cutoff)
+                delta += new_articles
+                print(f"📄 Page {page + 1}: {len(new_articles)} new article(s)")
+                if done or result_count < PAGE_SIZE:
+                    break
+            else:
+                print(f"⚠️ Stopped after NEWEST_MAX_PAGES={NEWEST_MAX_PAGES} pages; older new articles may remain.")
 
-            soup = BeautifulSoup(response.text, "html.parser")
-            results = soup.find_all("li", class_="arxiv-result")
-            if not results:
-                print("⚠️ No articles found on this page.")
-                break
+            inserted_ids = save_newest_delta(writer, delta, base_url, pdf_pipeline)
+            known_ids.add(inserted_ids)
+            scraped += len(inserted_ids)
+            print(f"📊 Progress: {scraped} article(s) saved")
 
-            parsed_articles = [parse_article(article) for article in results if parse_article(article) is not None]
+        else:
+            # Standard pagination scraping, resumed from the saved cursor in continue mode
+            start_offset = get_resume_offset(base_url) if continue_mode else 0
+            if start_offset:
+                print(f"↩️  Resuming {base_url} from offset {start_offset}")
+            scraped = start_offset
+            checkpointing = True
+            stop = False
+
+            for start in range(start_offset, total_articles, PAGE_SIZE):
+                if stop or scraped >= total_articles:
+                    break
 
-            for parsed in parsed_articles:
-                if scraped >= total_articles:
+                page = start // PAGE_SIZE
+                paged_url = f"{base_url}&size={PAGE_SIZE}&start={start}"
+                print(f"\n🔍 Scraping page {page + 1}:\n{paged_url}\n")
+
+                try:
+                    page_html = fetch_search_page(paged_url)
+                except Exception as e:
+                    print(f"❌ Failed to fetch page {page + 1}: {e}")
+                    # Never move the cursor past a page that was not processed
+                    checkpointing = False
+                    continue
+
+                result_count, parsed_articles = parse_search_page(page_html)
+                if not result_count:
+                    print("⚠️ No articles found on this page.")
                     break
 
-                article_id = parsed["article_id"]
-                if article_id in existing_ids:
-                    if continue_mode:
-                        print(f"⏭️  Skipping existing article_id: {article_id}")
-                        scraped += 1
-                        continue
-                    else:
-                        print(f"🛑 Found already scraped article_id: {article_id}. Stopping.")
-                        print_duration(time.time() - start_time)
-                        return
-
-                if S3_UPLOAD:
-                    print(f"📄 Downloading and uploading PDF for {article_id}...")
-                    uploaded_pdf_url = download_and_upload_pdf(article_id)
-                    if uploaded_pdf_url:
-                        parsed["uploaded_file_url"] = uploaded_pdf_url
-                        print(f"✅ Uploaded PDF for {article_id}")
-                    else:
-                        print(f"❌ Failed to upload PDF for {article_id}")
-
-                insert_article(parsed)
-                existing_ids.add(article_id)
-                scraped += 1
-
-                if scraped % PROGRESS_EVERY == 0:
+                existing_ids = known_ids.known(parsed["article_id"] for parsed in parsed_articles)
+                new_articles = []
+                complete = True
+                for parsed in parsed_articles:
+                    if scraped + len(new_articles) >= total_articles:
+                        complete = False
+                        break
+
+                    article_id = parsed["article_id"]
+                    if article_id in existing_ids:
+                        if continue_mode:
+                            print(f"⏭️  Skipping existing article_id: {article_id}")
+                            scraped += 1
+                            continue
+                        else:
+                            print(f"🛑 Found already scraped article_id: {article_id}. Stopping.")
+                            stop = True
+                            complete = False
+                            break
+
+                    new_articles.append(parsed)
+                    existing_ids.add(article_id)
+
+                checkpointing = checkpointing and complete
+                crawl_state = page_done(base_url, start) if checkpointing else None
+                known_ids.add(save_articles(writer, new_articles, pdf_pipeline, crawl_state))
+                scraped += len(new_articles)
+
+                if new_articles and scraped % PROGRESS_EVERY == 0:
                     print(f"📊 Progress: {scraped}/{total_articles} articles saved")
-
-                time.sleep(random.uniform(1.2, 2.5))
+    finally:
+        writer.flush()
+        if pdf_pipeline:
+            pdf_pipeline.close()
+        summary = write_run_summary(run_details("sync", base_url, newest, continue_mode, scraped),
+                                    metrics_before, time.time() - start_time)
 
     print(f"\n✅ Done. Scraped and saved {scraped} article(s).")
+    print(f"🗃️ Database: {writer.inserted} inserted, {writer.skipped} skipped, {writer.failed} failed")
     print_duration(time.time() - start_time)
+    return summary
@@ -1,4 +1,7 @@
 import os
+import time
+import uuid
+import threading
 import boto3
 from botocore.exceptions import NoCredentialsError, ClientError
 from dotenv import load_dotenv
@@ -13,6 +16,10 @@ SPACES_ENDPOINT = os.getenv("SPACES_ENDPOINT")
 
 PDF_FOLDER = "agritech-news-agent-pdfs"
 
+# Streamed uploads are split into parts of this size, so at most one part
+# of a PDF is buffered at any time (see StreamingUpload)
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+
 session = boto3.session.Session()
 s3 = session.client(
     service_name="s3",
@@ -22,30 +29,190 @@ s3 = session.client(
     aws_secret_access_key=SPACES_SECRET,
 )
 
+class ObjectManifest:
+    """
+    Local set of the object keys under `prefix`, so existence checks cost no
+    request. It is filled by one paginated `list_objects_v2` pass on first use
+    and kept current by `add()` after each upload. Objects written by another
+    process after the warm-up are only seen after `refresh()`. Concurrent first
+    uses (e.g. several PDF workers) wait for a single warm-up.
+    `client` defaults to the module's `s3` client.
+    """
+
+    def __init__(self, bucket, prefix, client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+        self._keys = None
+        self._lock = threading.Lock()
+        self._warm_up_lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """Reload every key under the prefix from the bucket. Returns how many were found."""
+        client = self.client or s3
+        keys = set()
+        paginator = client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.prefix}/"):
+            keys.update(obj["Key"] for obj in page.get("Contents", []))
+        with self._lock:
+            self._keys = keys
+        print(f"🗂️ Loaded {len(keys)} object key(s) from {self.bucket}/{self.prefix}")
+        return len(keys)
+
+    def _warm_up(self):
+        with self._warm_up_lock:
+            with self._lock:
+                loaded = self._keys is not None
+            if not loaded:
+                self.refresh()
+
+    def __contains__(self, object_key):
+        with self._lock:
+            loaded = self._keys is not None
+        if not loaded:
+            self._warm_up()
+        with self._lock:
+            return object_key in self._keys
+
+    def add(self, object_key):
+        with self._lock:
+            if self._keys is not None:
+                self._keys.add(object_key)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys or ())
+
+manifest = ObjectManifest(SPACES_BUCKET, PDF_FOLDER)
+
 def upload_pdf_to_spaces(file_path, object_name=None):
     if object_name is None:
         object_name = os.path.basename(file_path)
 
     # Prefix with folder path
-    object_key = f"{PDF_FOLDER}/{object_name}"
+    object_key = get_object_key(object_name)
 
     # Check if file already exists in the bucket
     try:
-        s3.head_object(Bucket=SPACES_BUCKET, Key=object_key)
-        url = f"{SPACES_ENDPOINT}/{SPACES_BUCKET}/{object_key}"
-        print(f"⚠️ File already exists in bucket. Skipping upload: {url}")
-        return url
+        if object_exists(object_key):
+            url = get_object_url(object_key)
+            print(f"⚠️ File already exists in bucket. Skipping upload: {url}")
+            return url
     except ClientError as e:
-        if e.response["Error"]["Code"] != "404":
-            print(f"❌ Error checking object existence: {e}")
-            return None
-        # File does not exist, continue to upload
+        print(f"❌ Error checking object existence: {e}")
+        return None
 
     try:
         s3.upload_file(file_path, SPACES_BUCKET, object_key, ExtraArgs={"ACL": "public-read"})
-        url = f"{SPACES_ENDPOINT}/{SPACES_BUCKET}/{object_key}"
+        manifest.add(object_key)
+        url = get_object_url(object_key)
         print(f"✅ Uploaded to {url}")
         return url
     except (NoCredentialsError, ClientError) as e:
         print(f"❌ Upload failed: {e}")
         return None
+
+
+def get_object_key(object_name):
+    return f"{PDF_FOLDER}/{object_name}"
+
+def get_object_url(object_key):
+    return f"{SPACES_ENDPOINT}/{SPACES_BUCKET}/{object_key}"
+
+def object_exists(object_key, refresh: bool = False) -> bool:
+    """
+    Return True if the key is already in the bucket, answered from the local
+    manifest. `refresh=True` re-lists the bucket first. Listing errors are raised.
+    """
+    if refresh:
+        manifest.refresh()
+    return object_key in manifest
+
+class StreamingUpload:
+    """
+    Writable sink that uploads a body while it is being written, for bodies
+    whose key is only known at the end (their content hash). At most one part
+    (MULTIPART_CHUNKSIZE) is held in memory and nothing touches the disk:
+    full parts go into a multipart upload under a temporary key, and
+    `save_as()` copies the result server-side to its final key, or drops it
+    when that key already exists. A body smaller than one part is put straight
+    at its final key. `upload_seconds` adds up the time spent in S3 calls.
+    """
+
+    def __init__(self, client=None, bucket=None, part_size=MULTIPART_CHUNKSIZE):
+        self.client = client or s3
+        self.bucket = bucket or SPACES_BUCKET
+        self.part_size = part_size
+        self.upload_seconds = 0.0
+        self._buffer = bytearray()
+        self._temp_key = None
+        self._upload_id = None
+        self._parts = []
+
+    def _call(self, method, **kwargs):
+        start = time.perf_counter()
+        try:
+            return getattr(self.client, method)(Bucket=self.bucket, **kwargs)
+        finally:
+            self.upload_seconds += time.perf_counter() - start
+
+    def _upload_part(self, body):
+        if self._upload_id is None:
+            self._temp_key = get_object_key(f"tmp/{uuid.uuid4().hex}.pdf")
+            self._upload_id = self._call("create_multipart_upload", Key=self._temp_key)["UploadId"]
+        number = len(self._parts) + 1
+        response = self._call("upload_part", Key=self._temp_key, UploadId=self._upload_id,
+                              PartNumber=number, Body=bytes(body))
+        self._parts.append({"PartNumber": number, "ETag": response["ETag"]})
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            self._upload_part(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+        return len(data)
+
+    def abort(self):
+        """Drop everything written so far (the multipart upload included)."""
+        if self._upload_id is not None:
+            try:
+                self._call("abort_multipart_upload", Key=self._temp_key, UploadId=self._upload_id)
+            except ClientError as e:
+                print(f"⚠️ Could not abort the upload of {self._temp_key}: {e}")
+        self._buffer = bytearray()
+        self._temp_key = self._upload_id = None
+        self._parts = []
+
+    def restart(self):
+        """Start the body over, e.g. when a download has to be restarted from byte 0."""
+        self.abort()
+
+    def save_as(self, object_name):
+        """
+        Store the body as `object_name`. Returns (public URL, False when those
+        bytes were already in the bucket under that name).
+        """
+        object_key = get_object_key(object_name)
+        if object_exists(object_key):
+            self.abort()
+            return get_object_url(object_key), False
+
+        extra = {"ACL": "public-read", "ContentType": "application/pdf"}
+        if self._upload_id is None:
+            self._call("put_object", Key=object_key, Body=bytes(self._buffer), **extra)
+        else:
+            if self._buffer:
+                self._upload_part(self._buffer)
+            self._call("complete_multipart_upload", Key=self._temp_key, UploadId=self._upload_id,
+                       MultipartUpload={"Parts": self._parts})
+            self._upload_id = None
+            try:
+                self._call("copy_object", Key=object_key, CopySource={"Bucket": self.bucket, "Key": self._temp_key},
+                           MetadataDirective="REPLACE", **extra)
+            finally:
+                self._call("delete_object", Key=self._temp_key)
+        self._buffer = bytearray()
+        manifest.add(object_key)
+        url = get_object_url(object_key)
+        print(f"✅ Uploaded to {url}")
+        return url, True
@@ -50,7 +50,7 @@ case "$1" in
     ;;
   rag-ingest)
     echo "📥 Running full RAG ingestion pipeline inside the container..."
-    docker exec -it -w /app/app $RAG_SCRAPER_CONTAINER_NAME python rag/ingestion_pipeline.py
+    docker exec -it -w /app/app $RAG_SCRAPER_CONTAINER_NAME python rag/ingestion_pipeline.py "${@:2}"
     ;;
   rag-incremental)
     echo "➕ Running incremental RAG ingestion inside the container..."
@@ -70,11 +70,43 @@ case "$1" in
     echo "📋 Showing RAG API logs..."
     docker compose -f $COMPOSE_FILE logs -f rag-api
     ;;
+  scraper-api-start)
+    echo "🚀 Starting scraper job service..."
+    docker compose -f $COMPOSE_FILE up -d scraper-api
+    echo "📡 Scraper API available at: http://localhost:8001"
+    echo "📚 API docs at: http://localhost:8001/docs"
+    ;;
+  scraper-api-stop)
+    echo "🛑 Stopping scraper job service..."
+    docker compose -f $COMPOSE_FILE stop scraper-api
+    ;;
+  scraper-api-logs)
+    echo "📋 Showing scraper API logs..."
+    docker compose -f $COMPOSE_FILE logs -f scraper-api
+    ;;
+  rag-indexer-start)
+    echo "🚀 Starting event-driven RAG indexer..."
+    docker compose -f $COMPOSE_FILE up -d rag-indexer
+    ;;
+  rag-indexer-stop)
+    echo "🛑 Stopping RAG indexer..."
+    docker compose -f $COMPOSE_FILE stop rag-indexer
+    ;;
+  rag-indexer-logs)
+    echo "📋 Showing RAG indexer logs..."
+    docker compose -f $COMPOSE_FILE logs -f rag-indexer
+    ;;
+  rag-index-once)
+    echo "🔎 Indexing unindexed articles inside the container..."
+    docker exec -it $RAG_SCRAPER_CONTAINER_NAME python -m app.rag.indexer --once
+    ;;
   scrape)
     echo "📄 Running scraper inside the container..."
 
     ARTICLE_LIMIT=25
     CONTINUE_FLAG=""
+    ASYNC_FLAG=""
+    QUERIES_FLAG=""
     BACKGROUND="false"
 
     for arg in "$@"; do
@@ -82,6 +114,12 @@ case "$1" in
         -continue)
           CONTINUE_FLAG="--continue"
           ;;
+        -async)
+          ASYNC_FLAG="--async"
+          ;;
+        --queries=*)
+          QUERIES_FLAG="$arg"
+          ;;
         -bg)
           BACKGROUND="true"
           ;;
@@ -92,13 +130,13 @@ case "$1" in
           ;; # skip
         *)
           echo "❌ Invalid argument: '$arg'"
-          echo "Usage: bash $0 scrape [limit] [-continue] [-bg]"
+          echo "Usage: bash $0 scrape [limit] [-continue] [-async] [--queries=q1,q2] [-bg]"
           exit 1
           ;;
       esac
     done
 
-    CMD="python app/scraper/main.py $ARTICLE_LIMIT $CONTINUE_FLAG"
+    CMD="python app/scraper/main.py $ARTICLE_LIMIT $CONTINUE_FLAG $ASYNC_FLAG $QUERIES_FLAG"
 
     if [ "$BACKGROUND" = "true" ]; then
       echo "🧵 Running in background with nohup..."
@@ -113,10 +151,14 @@ case "$1" in
   scrape-newest)
     echo "📰 Scraping newest articles (most recent first)..."
 
+    ASYNC_FLAG=""
     BACKGROUND="false"
 
     for arg in "$@"; do
       case "$arg" in
+        -async)
+          ASYNC_FLAG="--async"
+          ;;
         -bg)
           BACKGROUND="true"
           ;;
@@ -124,13 +166,13 @@ case "$1" in
           ;; # skip
         *)
           echo "❌ Invalid argument: '$arg'"
-          echo "Usage: bash $0 scrape-newest [-bg]"
+          echo "Usage: bash $0 scrape-newest [-async] [-bg]"
           exit 1
           ;;
       esac
     done
 
-    CMD="python app/scraper/main.py --newest --continue"
+    CMD="python app/scraper/main.py --newest --continue $ASYNC_FLAG"
 
     if [ "$BACKGROUND" = "true" ]; then
       echo "🧵 Running in background with nohup..."
@@ -142,6 +184,91 @@ case "$1" in
     fi
     ;;
 
+  harvest)
+    echo "🌾 Harvesting arXiv metadata over OAI-PMH inside the container..."
+
+    HARVEST_ARGS=""
+    BACKGROUND="false"
+
+    for arg in "$@"; do
+      case "$arg" in
+        -bg)
+          BACKGROUND="true"
+          ;;
+        [0-9]*)
+          HARVEST_ARGS="$HARVEST_ARGS $arg"
+          ;;
+        --set=*|--from=*)
+          HARVEST_ARGS="$HARVEST_ARGS $arg"
+          ;;
+        harvest)
+          ;; # skip
+        *)
+          echo "❌ Invalid argument: '$arg'"
+          echo "Usage: bash $0 harvest [limit] [--set=SET] [--from=YYYY-MM-DD] [-bg]"
+          exit 1
+          ;;
+      esac
+    done
+
+    CMD="python app/scraper/main.py --harvest $HARVEST_ARGS"
+
+    if [ "$BACKGROUND" = "true" ]; then
+      echo "🧵 Running in background with nohup..."
+      nohup docker exec $RAG_SCRAPER_CONTAINER_NAME $CMD > logs/harvest.out 2>&1 &
+      echo "📌 Background PID: $!"
+      echo "📝 Logs: logs/harvest.out"
+    else
+      docker exec -it $RAG_SCRAPER_CONTAINER_NAME $CMD
+    fi
+    ;;
+
+  backfill-dates)
+    echo "🗓️ Backfilling typed date columns on existing articles..."
+    docker exec -it $RAG_SCRAPER_CONTAINER_NAME python app/scraper/main.py --backfill-dates
+    ;;
+
+  refresh-pdfs)
+    shift
+    REFRESH_ARGS=""
+    BACKGROUND=false
+
+    for arg in "$@"; do
+      case $arg in
+        -bg) BACKGROUND=true ;;
+        [0-9]*) REFRESH_ARGS="$arg" ;;
+        *)
+          echo "❌ Invalid argument: '$arg'"
+          echo "Usage: bash $0 refresh-pdfs [limit] [-bg]"
+          exit 1
+          ;;
+      esac
+    done
+
+    CMD="python app/scraper/main.py --refresh-pdfs $REFRESH_ARGS"
+
+    if [ "$BACKGROUND" = "true" ]; then
+      echo "🧵 Running in background with nohup..."
+      nohup docker exec $RAG_SCRAPER_CONTAINER_NAME $CMD > logs/refresh-pdfs.out 2>&1 &
+      echo "📌 Background PID: $!"
+      echo "📝 Logs: logs/refresh-pdfs.out"
+    else
+      docker exec -it $RAG_SCRAPER_CONTAINER_NAME $CMD
+    fi
+    ;;
+
+  benchmark-scrape)
+    shift
+    echo "🏁 Running the offline scrape benchmark inside the container..."
+    docker exec -it $RAG_SCRAPER_CONTAINER_NAME python app/scraper/benchmark_scrape.py "$@"
+    ;;
+
+  reparse)
+    shift
+    echo "♻️ Re-parsing archived search pages inside the container..."
+    docker exec -it $RAG_SCRAPER_CONTAINER_NAME python app/scraper/reparse.py "$@"
+    ;;
+
   stop-scraper)
     echo "🛑 Attempting to stop background scraper process..."
     docker exec -it $RAG_SCRAPER_CONTAINER_NAME pkill -f main.py && echo "✅ Scraper stopped." || echo "⚠️ No running scraper found."
@@ -153,15 +280,27 @@ case "$1" in
     echo "  bash $0 down"
     echo "  bash $0 restart"
     echo "  bash $0 logs [service]"
-    echo "  bash $0 scrape [limit] [-continue] [-bg]"
-    echo "  bash $0 scrape-newest [-bg]"
+    echo "  bash $0 scrape [limit] [-continue] [-async] [--queries=q1,q2] [-bg]"
+    echo "  bash $0 scrape-newest [-async] [-bg]"
+    echo "  bash $0 harvest [limit] [--set=SET] [--from=YYYY-MM-DD] [-bg]"
+    echo "  bash $0 benchmark-scrape <pages dir or archive> [limit] [--async] [--no-pdfs]"
+    echo "  bash $0 reparse <archive file or dir> [--dry-run]"
+    echo "  bash $0 backfill-dates"
+    echo "  bash $0 refresh-pdfs [limit] [-bg]"
     echo "  bash $0 stop-scraper"
+    echo "  bash $0 scraper-api-start"
+    echo "  bash $0 scraper-api-stop"
+    echo "  bash $0 scraper-api-logs"
     echo "  bash $0 rag"
-    echo "  bash $0 rag-ingest"
+    echo "  bash $0 rag-ingest [--stream]"
     echo "  bash $0 rag-incremental"
     echo "  bash $0 rag-api-start"
     echo "  bash $0 rag-api-stop"
     echo "  bash $0 rag-api-logs"
+    echo "  bash $0 rag-indexer-start"
+    echo "  bash $0 rag-indexer-stop"
+    echo "  bash $0 rag-indexer-logs"
+    echo "  bash $0 rag-index-once"
     exit 1
     ;;
 esac
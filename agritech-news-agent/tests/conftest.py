@@ -0,0 +1,8 @@
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES_DIR, *parts), "r", encoding="utf-8") as f:
+        return f.read()
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from app import db
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.commits = 0
+
+    def get_transaction_status(self):
+        return 0  # TRANSACTION_STATUS_IDLE
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    connections = []
+
+    def connect():
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(db, "get_connection", connect)
+    return connections
+
+
+def test_pool_reuses_returned_connections(opened):
+    pool = db.ConnectionPool(min_size=1, max_size=4)
+    for _ in range(3):
+        with pool.connection():
+            pass
+    assert len(opened) == 1
+    assert opened[0].commits == 3
+
+
+def test_pool_keeps_concurrent_connections_open(opened):
+    pool = db.ConnectionPool(min_size=1, max_size=4)
+    inside = threading.Barrier(3)
+
+    def checkout():
+        with pool.connection():
+            inside.wait(timeout=5)
+
+    for _ in range(2):
+        threads = [threading.Thread(target=checkout) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    # The second round of concurrent checkouts reuses the three connections of the first
+    assert len(opened) == 3
+    assert not any(conn.closed for conn in opened)
+
+
+def test_pool_drops_broken_connections(opened):
+    pool = db.ConnectionPool(min_size=1, max_size=2)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.closed = 2
+            raise RuntimeError("server closed the connection")
+    assert pool._last_used == {}
+    with pool.connection() as conn:
+        assert conn is opened[1]
+    pool.close()
+    assert opened[1].closed and pool._last_used == {}
@@ -0,0 +1,197 @@
+import json
+import os
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.scraper import harvester
+from conftest import read_fixture
+
+PAGE_1 = read_fixture("oai", "list_records_page1.xml")
+PAGE_2 = read_fixture("oai", "list_records_page2.xml")
+NO_RECORDS = read_fixture("oai", "no_records_match.xml")
+TOKEN = "6960524|1001"
+
+
+class FakeWriter:
+    inserted = skipped = failed = 0
+
+    def __init__(self, batch_size=None):
+        pass
+
+    def flush(self):
+        pass
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """Run harvest() without Postgres or Spaces; returns the ids it saved, in order."""
+    saved_ids = []
+    monkeypatch.setattr(harvester, "init_db", lambda: None)
+    monkeypatch.setattr(harvester, "ArticleWriter", FakeWriter)
+    monkeypatch.setattr(harvester, "start_pdf_pipeline", lambda: None)
+    monkeypatch.setattr(
+        harvester, "save_articles",
+        lambda writer, articles, pdf_pipeline: saved_ids.extend(a["article_id"] for a in articles),
+    )
+    return saved_ids
+
+
+def recorded(*pages):
+    """A `fetch` replaying the recorded pages in order; keeps the params of each call."""
+    pages = list(pages)
+    calls = []
+
+    def fetch(params):
+        calls.append(dict(params))
+        return pages.pop(0)
+
+    fetch.calls = calls
+    return fetch
+
+
+def test_parse_list_records_skips_deleted_records():
+    articles, token = harvester.parse_list_records(PAGE_2)
+    assert [a["article_id"] for a in articles] == ["2401.00105", "2401.00106"]
+    assert token is None
+
+
+def test_parse_record_maps_arxiv_metadata():
+    articles, token = harvester.parse_list_records(PAGE_1)
+    first = articles[0]
+    assert token == TOKEN
+    assert first["title"] == "Soil moisture forecasting for precision agriculture with graph networks"
+    assert first["authors"] == "Ada N. Okafor, Erik Lindqvist Jr"
+    assert first["abstract"] == "We forecast soil moisture at field scale from sparse sensor networks."
+    assert first["submission_date"] == "2 January, 2024"
+    assert first["originally_announced"] == "January 2024"
+    assert first["pdf_url"].endswith("/pdf/2401.00101")
+
+
+def test_harvest_follows_resumption_token(saved, tmp_path):
+    fetch = recorded(PAGE_1, PAGE_2)
+    result = harvester.harvest(set_spec="q-bio", from_date="2024-01-01",
+                               checkpoint_path=str(tmp_path / "checkpoint.json"), fetch=fetch)
+
+    assert saved == ["2401.00101", "2401.00103", "2401.00105"]
+    assert fetch.calls == [
+        {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": "q-bio", "from": "2024-01-01"},
+        {"verb": "ListRecords", "resumptionToken": TOKEN},
+    ]
+    assert result["matched"] == 3
+    assert not os.path.exists(result["checkpoint"])
+
+
+def test_no_records_match_is_an_empty_harvest(saved, tmp_path):
+    result = harvester.harvest(from_date="2030-01-01", checkpoint_path=str(tmp_path / "checkpoint.json"),
+                               fetch=recorded(NO_RECORDS))
+    assert saved == []
+    assert result["pages"] == 1
+    assert not os.path.exists(result["checkpoint"])
+
+
+def test_other_oai_errors_are_raised():
+    error = NO_RECORDS.replace("noRecordsMatch", "badResumptionToken")
+    with pytest.raises(RuntimeError, match="badResumptionToken"):
+        harvester.parse_list_records(error)
+
+
+def test_limit_inside_first_page_resumes_that_page(saved, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    first = harvester.harvest(set_spec="q-bio", limit=1, checkpoint_path=path, fetch=recorded(PAGE_1))
+    assert saved == ["2401.00101"]
+
+    with open(first["checkpoint"], encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    assert checkpoint["request"] == {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": "q-bio"}
+    assert checkpoint["skip"] == 1
+
+    fetch = recorded(PAGE_1, PAGE_2)
+    harvester.harvest(set_spec="q-bio", checkpoint_path=path, fetch=fetch)
+    assert saved == ["2401.00101", "2401.00103", "2401.00105"]
+    assert fetch.calls[0] == checkpoint["request"]
+    assert not os.path.exists(first["checkpoint"])
+
+
+def test_limit_at_page_end_resumes_from_next_token(saved, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    harvester.harvest(limit=2, checkpoint_path=path, fetch=recorded(PAGE_1))
+
+    fetch = recorded(PAGE_2)
+    harvester.harvest(checkpoint_path=path, fetch=fetch)
+    assert fetch.calls == [{"verb": "ListRecords", "resumptionToken": TOKEN}]
+    assert saved == ["2401.00101", "2401.00103", "2401.00105"]
+
+
+def test_failed_insert_does_not_move_the_checkpoint(monkeypatch, saved, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+
+    def save_articles(writer, articles, pdf_pipeline):
+        if any(a["article_id"] == "2401.00105" for a in articles):
+            writer.failed += len(articles)  # What ArticleWriter.flush does when the insert raises
+        else:
+            saved.extend(a["article_id"] for a in articles)
+
+    monkeypatch.setattr(harvester, "save_articles", save_articles)
+    with pytest.raises(RuntimeError, match="page 2"):
+        harvester.harvest(checkpoint_path=path, fetch=recorded(PAGE_1, PAGE_2))
+
+    params = {"query": "agriculture", "set": None, "from": None, "until": None}
+    checkpoint = harvester.load_checkpoint(harvester.checkpoint_file(path, params), params)
+    assert checkpoint["request"] == {"verb": "ListRecords", "resumptionToken": TOKEN}
+    assert checkpoint["matched"] == 2
+
+    monkeypatch.setattr(harvester, "save_articles",
+                        lambda writer, articles, pdf_pipeline: saved.extend(a["article_id"] for a in articles))
+    fetch = recorded(PAGE_2)
+    harvester.harvest(checkpoint_path=path, fetch=fetch)
+    assert fetch.calls == [{"verb": "ListRecords", "resumptionToken": TOKEN}]
+    assert saved == ["2401.00101", "2401.00103", "2401.00105"]
+
+
+def test_checkpoint_is_keyed_by_harvest_parameters(saved, tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    stopped = harvester.harvest(set_spec="q-bio", limit=1, checkpoint_path=path, fetch=recorded(PAGE_1))
+
+    fetch = recorded(NO_RECORDS)
+    other = harvester.harvest(set_spec="cs", checkpoint_path=path, fetch=fetch)
+    assert other["checkpoint"] != stopped["checkpoint"]
+    assert fetch.calls == [{"verb": "ListRecords", "metadataPrefix": "arXiv", "set": "cs"}]
+    assert os.path.exists(stopped["checkpoint"])
+
+
+def test_checkpoint_of_another_harvest_is_ignored(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    harvester.save_checkpoint(path, {"harvest": {"set": "cs"}, "request": {"resumptionToken": "x"}})
+    assert harvester.load_checkpoint(path, {"set": "q-bio"}) is None
+    assert harvester.load_checkpoint(path, {"set": "cs"})["request"] == {"resumptionToken": "x"}
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+@pytest.mark.parametrize("retry_after, expected", [
+    ("7", 7),
+    ("http-date", 30),
+    ("soon", harvester.HARVEST_RETRY_AFTER),
+])
+def test_fetch_oai_honours_retry_after(monkeypatch, retry_after, expected):
+    if retry_after == "http-date":
+        retry_after = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    responses = [FakeResponse(503, headers={"Retry-After": retry_after}), FakeResponse(200, PAGE_1)]
+    sleeps = []
+    monkeypatch.setattr(harvester.requests, "get", lambda *args, **kwargs: responses.pop(0))
+    monkeypatch.setattr(harvester.rate_limiter, "wait", lambda url: None)
+    monkeypatch.setattr(harvester.time, "sleep", sleeps.append)
+
+    assert harvester.fetch_oai({"verb": "ListRecords"}) == PAGE_1
+    assert len(sleeps) == 1 and sleeps[0] == pytest.approx(expected, abs=2)
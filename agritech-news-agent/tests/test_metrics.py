@@ -0,0 +1,40 @@
+import threading
+import contextvars
+
+from app.metrics import Registry
+
+
+def test_concurrent_runs_are_summarized_separately():
+    registry = Registry()
+    pages = registry.counter("test_pages_total", "Pages")
+    latency = registry.histogram("test_latency_seconds", "Latency")
+    ready = threading.Barrier(2)
+    summaries = {}
+
+    def job(name, count):
+        with registry.run():
+            ready.wait(timeout=5)
+            for _ in range(count):
+                pages.inc()
+            # Worker threads get a copy of the job's context, like the PDF pipeline's
+            worker = threading.Thread(target=contextvars.copy_context().run, args=(latency.observe, 0.2))
+            worker.start()
+            worker.join()
+            ready.wait(timeout=5)  # Both jobs have recorded everything before either summarizes
+            summaries[name] = registry.summarize()
+
+    threads = [threading.Thread(target=job, args=("a", 3)), threading.Thread(target=job, args=("b", 5))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert summaries["a"]["test_pages_total"] == 3
+    assert summaries["b"]["test_pages_total"] == 5
+    assert summaries["a"]["test_latency_seconds"]["count"] == 1
+    assert pages.value == 8 and latency.count == 2
+    # Outside a run: the process-wide difference from the snapshot
+    before = registry.snapshot()
+    pages.inc()
+    assert registry.summarize(before)["test_pages_total"] == 1
+    assert not registry.in_run()
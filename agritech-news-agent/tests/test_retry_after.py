@@ -0,0 +1,41 @@
+import types
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.scraper.rate_limiter import parse_retry_after
+from app.rag.modules.rate_control import retry_after_seconds
+
+
+def http_date(seconds_from_now):
+    return format_datetime(datetime.now(timezone.utc) + timedelta(seconds=seconds_from_now), usegmt=True)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("7", 7.0),
+    (" 120 ", 120.0),
+    ("1.5", 1.5),
+    (None, None),
+    ("", None),
+    ("soon", None),
+    ("-3", None),
+])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after(http_date(30)) == pytest.approx(30, abs=2)
+    assert parse_retry_after(http_date(-30)) == 0.0
+    assert parse_retry_after("soon", default=10) == 10
+
+
+def test_mistral_errors_use_the_shared_parser():
+    def error(headers):
+        return types.SimpleNamespace(raw_response=types.SimpleNamespace(headers=headers))
+
+    assert retry_after_seconds(error({"Retry-After": "2"})) == 2.0
+    assert retry_after_seconds(error({"Retry-After": http_date(30)})) == pytest.approx(30, abs=2)
+    assert retry_after_seconds(error({})) is None
+    assert retry_after_seconds(RuntimeError("no response")) is None
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import boto3
+import pytest
+from moto import mock_aws
+
+from app.scraper import uploader
+from app.scraper.uploader import ObjectManifest
+
+BUCKET = "agritech-test"
+PREFIX = uploader.PDF_FOLDER
+PART = 5 * 1024 * 1024  # S3's smallest part
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        client.list_calls = 0
+
+        def count_listing(**kwargs):
+            client.list_calls += 1
+
+        client.meta.events.register("before-call.s3.ListObjectsV2", count_listing)
+        yield client
+
+
+@pytest.fixture
+def spaces(s3, monkeypatch):
+    """Point the module-level client and manifest at the moto bucket."""
+    manifest = ObjectManifest(BUCKET, PREFIX, client=s3)
+    monkeypatch.setattr(uploader, "s3", s3)
+    monkeypatch.setattr(uploader, "manifest", manifest)
+    monkeypatch.setattr(uploader, "SPACES_BUCKET", BUCKET)
+    return manifest
+
+
+def put(client, key):
+    client.put_object(Bucket=BUCKET, Key=key, Body=b"%PDF-1.4")
+
+
+def test_warm_up_reads_every_page_of_the_listing(s3):
+    for i in range(1005):
+        put(s3, f"{PREFIX}/sha256/{i:064x}.pdf")
+    put(s3, "other-folder/outside.pdf")
+
+    manifest = ObjectManifest(BUCKET, PREFIX, client=s3)
+    assert f"{PREFIX}/sha256/{1004:064x}.pdf" in manifest
+    assert f"{PREFIX}/sha256/{0:064x}.pdf" in manifest
+    assert "other-folder/outside.pdf" not in manifest
+    assert len(manifest) == 1005
+    assert s3.list_calls == 2  # 1000 keys per page
+
+    assert f"{PREFIX}/missing.pdf" not in manifest
+    assert s3.list_calls == 2  # Later checks are answered locally
+
+
+def test_concurrent_first_use_lists_the_bucket_once(s3):
+    put(s3, f"{PREFIX}/a.pdf")
+
+    def slow_listing(**kwargs):
+        time.sleep(0.2)
+
+    s3.meta.events.register("before-call.s3.ListObjectsV2", slow_listing)
+    manifest = ObjectManifest(BUCKET, PREFIX, client=s3)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(f"{PREFIX}/a.pdf" in manifest)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 8
+    assert s3.list_calls == 1
+
+
+@pytest.mark.parametrize("size", [12, PART + 10], ids=["put", "multipart"])
+def test_upload_adds_the_key_to_the_manifest(spaces, s3, size):
+    key = uploader.get_object_key("sha256/new.pdf")
+    assert not uploader.object_exists(key)
+    calls = s3.list_calls
+
+    upload = uploader.StreamingUpload(part_size=PART)
+    upload.write(b"n" * size)
+    url, uploaded = upload.save_as("sha256/new.pdf")
+    assert uploaded and url.endswith(f"/{BUCKET}/{key}")
+    assert uploader.object_exists(key)
+    assert s3.list_calls == calls
+    assert s3.get_object(Bucket=BUCKET, Key=key)["Body"].read() == b"n" * size
+
+
+def test_object_exists_refresh_sees_objects_written_elsewhere(spaces, s3):
+    key = uploader.get_object_key("from-another-process.pdf")
+    assert not uploader.object_exists(key)
+
+    put(s3, key)
+    assert not uploader.object_exists(key)  # Still the warm-up snapshot
+    assert uploader.object_exists(key, refresh=True)
+    assert s3.list_calls == 2
+
+
+def stored_keys(client):
+    return sorted(obj["Key"] for obj in client.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+def open_uploads(client):
+    return client.list_multipart_uploads(Bucket=BUCKET).get("Uploads", [])
+
+
+def test_streaming_upload_small_body_is_put_directly(spaces, s3):
+    upload = uploader.StreamingUpload(part_size=PART)
+    upload.write(b"%PDF-1.4 ")
+    upload.write(b"small")
+    url, uploaded = upload.save_as("sha256/small.pdf")
+
+    key = uploader.get_object_key("sha256/small.pdf")
+    assert uploaded and url.endswith(key)
+    assert stored_keys(s3) == [key]
+    assert s3.get_object(Bucket=BUCKET, Key=key)["ContentType"] == "application/pdf"
+    assert uploader.object_exists(key)
+
+
+def test_streaming_upload_large_body_is_copied_from_a_temporary_key(spaces, s3):
+    body = bytes(range(256)) * (11 * 1024 * 1024 // 256)  # Two full parts and a remainder
+    upload = uploader.StreamingUpload(part_size=PART)
+    for offset in range(0, len(body), 256 * 1024):
+        upload.write(body[offset:offset + 256 * 1024])
+    assert len(upload._buffer) < PART  # Only the part being filled is held in memory
+
+    upload.save_as("sha256/large.pdf")
+    key = uploader.get_object_key("sha256/large.pdf")
+    assert stored_keys(s3) == [key]  # The temporary key is gone
+    assert s3.get_object(Bucket=BUCKET, Key=key)["Body"].read() == body
+    assert not open_uploads(s3)
+    assert upload.upload_seconds > 0
+
+
+@pytest.mark.parametrize("size", [12, PART + 10], ids=["put", "multipart"])
+def test_streaming_upload_drops_bytes_already_in_the_bucket(spaces, s3, size):
+    key = uploader.get_object_key("sha256/known.pdf")
+    put(s3, key)
+
+    upload = uploader.StreamingUpload(part_size=PART)
+    upload.write(b"x" * size)
+    url, uploaded = upload.save_as("sha256/known.pdf")
+
+    assert not uploaded and url.endswith(key)
+    assert stored_keys(s3) == [key]
+    assert s3.get_object(Bucket=BUCKET, Key=key)["Body"].read() == b"%PDF-1.4"  # Left untouched
+    assert not open_uploads(s3)
+
+
+def test_streaming_upload_restart_discards_written_parts(spaces, s3):
+    upload = uploader.StreamingUpload(part_size=PART)
+    upload.write(b"a" * (PART + 1))
+    upload.restart()
+    assert not open_uploads(s3)
+
+    upload.write(b"fresh")
+    upload.save_as("sha256/fresh.pdf")
+    assert s3.get_object(Bucket=BUCKET, Key=uploader.get_object_key("sha256/fresh.pdf"))["Body"].read() == b"fresh"